@@ -1,9 +1,747 @@
 import tkinter as tk
 import time
-import threading
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import math
+import os
 import random
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from itertools import islice
+from hanoi_perf import PerfHud, PerfMonitor, ProfilerHook
+from hanoi_solver import MAX_DISKS, VARIANTS, closed_form, make_plan, pegs_from_towers, quick_to_plan
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAX_GUI_PEGS = 8
+DISK_CHOICES = list(range(1, 11)) + [16, 32, 64, 128, 256, 512, 1024, 2048]
+
+# Below LOD_DISK_HEIGHT pixels per disk the board switches to bands: runs of
+# adjacent disks drawn as one flat shape at least LOD_BAND_HEIGHT pixels tall,
+# so the item count depends on the canvas size and not on the disk count.
+LABEL_MIN_HEIGHT = 12
+LOD_DISK_HEIGHT = 6
+LOD_BAND_HEIGHT = 3
+SPRITE_CACHE_SIZE = 256
+CELEBRATION_PARTICLES = 400
+MAX_COMPARE_BOARDS = 9
+PLAN_POLL_MS = 50
+
+# Tk keeps scale positions as doubles, so long solutions are mapped onto a
+# fixed number of timeline steps instead of one step per move.
+TIMELINE_STEPS = 1 << 52
+
+def plan_in_background(future, *args):
+    try:
+        future.set_result(make_plan(*args))
+    except Exception as error:
+        future.set_exception(error)
+
+def format_count(count):
+    digits = str(count)
+    if len(digits) <= 15:
+        return digits
+    return f"{digits[0]}.{digits[1:4]}e{len(digits) - 1}"
+
+class FrameClock:
+    def __init__(self, root, fps, monitor=None):
+        self.root = root
+        self.monitor = monitor if monitor is not None else PerfMonitor()
+        self.frame_time = 1.0 / fps
+        self.callbacks = []
+        self.job = None
+        self.ticking = False
+        self.next_tick = 0.0
+        self.dropped_frames = 0
+        
+    def subscribe(self, callback):
+        if callback not in self.callbacks:
+            self.callbacks.append(callback)
+        # A callback subscribing from inside tick() is picked up by the tick's
+        # own rescheduling below.
+        if self.job is None and not self.ticking:
+            self.next_tick = time.perf_counter()
+            self.job = self.root.after_idle(self.tick)
+    
+    def unsubscribe(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+        if not self.callbacks and self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+    
+    def tick(self):
+        self.job = None
+        now = time.perf_counter()
+        
+        self.ticking = True
+        try:
+            with self.monitor.section("tick"):
+                for callback in list(self.callbacks):
+                    callback(now)
+        finally:
+            self.ticking = False
+        self.monitor.frame(now, time.perf_counter() - now, max(0.0, now - self.next_tick), self.frame_time)
+        
+        if not self.callbacks:
+            return
+        
+        # Only one tick is ever pending. When a frame overruns, the missed
+        # deadlines are skipped instead of being queued up behind it.
+        self.next_tick += self.frame_time
+        now = time.perf_counter()
+        if self.next_tick < now:
+            missed = int((now - self.next_tick) / self.frame_time) + 1
+            self.dropped_frames += missed
+            self.monitor.dropped(missed)
+            self.next_tick += missed * self.frame_time
+        
+        self.job = self.root.after(max(0, int((self.next_tick - now) * 1000)), self.tick)
+
+class HanoiRenderer:
+    def __init__(self, canvas, tower_color, base_color, disk_colors):
+        self.canvas = canvas
+        self.tower_color = tower_color
+        self.base_color = base_color
+        self.disk_colors = disk_colors
+        
+        self.layout_key = None
+        self.disk_pos = {}
+        self.background_key = None
+        self.background_image = None
+        self.sprites = OrderedDict()
+        self.shades = {}
+        for color in disk_colors:
+            r, g, b = int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+            self.shades[color] = (
+                f"#{min(r+30, 255):02x}{min(g+30, 255):02x}{min(b+30, 255):02x}",
+                f"#{max(r-30, 0):02x}{max(g-30, 0):02x}{max(b-30, 0):02x}",
+            )
+        
+    def layout(self, width, height, disk_count, peg_count=3):
+        key = (width, height, disk_count, peg_count)
+        if key == self.layout_key:
+            return False
+        
+        self.layout_key = key
+        self.sprites.clear()
+        self.width = width
+        self.height = height
+        self.disk_count = disk_count
+        self.peg_count = peg_count
+        
+        self.tower_width = 20
+        self.tower_height = height * 0.7
+        self.tower_spacing = width / (peg_count + 1)
+        self.tower_bottom = height * 0.8
+        self.tower_top = self.tower_bottom - self.tower_height
+        self.base_height = 30
+        self.max_disk_width = self.tower_spacing * 0.8
+        self.disk_height = min(30, self.tower_height / (disk_count + 2))
+        self.aggregate = self.disk_height < LOD_DISK_HEIGHT
+        self.band_size = math.ceil(LOD_BAND_HEIGHT / self.disk_height)
+        # Without bands every disk is drawn as a sprite, so the cache has to
+        # hold one per disk; a tall canvas can show more than the default.
+        self.sprite_limit = SPRITE_CACHE_SIZE if self.aggregate else max(SPRITE_CACHE_SIZE, disk_count)
+        return True
+    
+    def invalidate(self):
+        self.layout_key = None
+    
+    def tower_x(self, peg):
+        return self.tower_spacing * (peg + 1)
+    
+    def slot(self, peg, index):
+        return self.tower_x(peg), self.tower_bottom - (index + 1) * self.disk_height
+    
+    def peg_at(self, x):
+        return min(max(int(round(x / self.tower_spacing)) - 1, 0), self.peg_count - 1)
+    
+    def tower_name(self, peg):
+        if peg == 0:
+            return "Source"
+        if peg == self.peg_count - 1:
+            return "Target"
+        if self.peg_count == 3:
+            return "Auxiliary"
+        return f"Auxiliary {peg}"
+    
+    def disk_width(self, disk):
+        return self.max_disk_width * (disk / self.disk_count)
+    
+    def build(self, towers):
+        self.canvas.delete("all")
+        self.disk_pos = {}
+        
+        self.draw_background(self.width, self.height)
+        
+        base_width = self.tower_spacing * self.peg_count
+        base_left = self.tower_spacing - base_width/2
+        
+        self.draw_3d_base(base_left, self.tower_bottom, base_width, self.base_height)
+        
+        for i in range(self.peg_count):
+            tower_x = self.tower_x(i)
+            
+            self.draw_3d_tower(tower_x, self.tower_top, self.tower_bottom, self.tower_width)
+            
+            tower_name = self.tower_name(i)
+            self.canvas.create_text(
+                tower_x, self.tower_bottom + self.base_height + 20,
+                text=tower_name, fill="white", font=("Helvetica", 12, "bold")
+            )
+        
+        self.sync(towers, range(len(towers)))
+    
+    def sync(self, towers, pegs):
+        if self.aggregate:
+            # Loose disks are the ones drawn off the stacks (the disk in flight
+            # or lifted while editing); the bands already include any of them
+            # that have landed since.
+            self.canvas.delete("loose")
+            self.disk_pos = {}
+            for peg in pegs:
+                self.draw_bands(peg, towers[peg])
+            return
+        
+        for peg in pegs:
+            for j, disk in enumerate(towers[peg]):
+                self.place_disk(disk, *self.slot(peg, j))
+    
+    def draw_bands(self, peg, tower):
+        tag = f"bands{peg}"
+        self.canvas.delete(tag)
+        
+        x = self.tower_x(peg)
+        for j in range(0, len(tower), self.band_size):
+            top = min(j + self.band_size, len(tower)) - 1
+            bottom_half = self.disk_width(tower[j]) / 2
+            top_half = self.disk_width(tower[top]) / 2
+            y_bottom = self.slot(peg, j)[1] + self.disk_height
+            y_top = self.slot(peg, top)[1]
+            
+            self.canvas.create_polygon(
+                x - bottom_half, y_bottom, x + bottom_half, y_bottom,
+                x + top_half, y_top, x - top_half, y_top,
+                fill=self.disk_colors[tower[j] % len(self.disk_colors)], outline="", tags=("disk", tag)
+            )
+    
+    def place_disk(self, disk, x, y):
+        pos = self.disk_pos.get(disk)
+        if pos is None and self.aggregate:
+            width = self.disk_width(disk)
+            self.canvas.create_rectangle(
+                x - width/2, y, x + width/2, y + self.disk_height,
+                fill=self.disk_colors[disk % len(self.disk_colors)], outline="",
+                tags=("disk", "loose", f"disk{disk}")
+            )
+        elif pos is None:
+            self.draw_3d_disk(x, y, self.disk_width(disk), self.disk_height, disk)
+        elif pos != (x, y):
+            self.canvas.move(f"disk{disk}", x - pos[0], y - pos[1])
+        self.disk_pos[disk] = (x, y)
+    
+    def raise_disk(self, disk):
+        self.canvas.tag_raise(f"disk{disk}")
+    
+    def motion_path(self, source, target, steps):
+        # A quadratic Bezier arc between two slots, rising 100 px above the
+        # higher one.
+        (source_x, source_y), (target_x, target_y) = source, target
+        control_y = min(source_y, target_y) - 100
+        
+        path = []
+        for i in range(steps + 1):
+            t = i / steps
+            x = (1-t)**2 * source_x + 2*(1-t)*t * ((source_x + target_x)/2) + t**2 * target_x
+            y = (1-t)**2 * source_y + 2*(1-t)*t * control_y + t**2 * target_y
+            path.append((x, y))
+            
+        return path
+    
+    def draw_background(self, width, height):
+        if self.background_key != (width, height):
+            self.background_image = self.render_background(width, height)
+            self.background_key = (width, height)
+        
+        self.canvas.create_image(0, 0, image=self.background_image, anchor=tk.NW)
+    
+    def render_background(self, width, height):
+        rows = []
+        for i in range(height):
+            r = int(30 + (i / height) * 10)
+            g = int(39 + (i / height) * 15)
+            b = int(46 + (i / height) * 20)
+            rows.append(f"{{#{r:02x}{g:02x}{b:02x}}}")
+        
+        column = tk.PhotoImage(master=self.canvas, width=1, height=height)
+        column.put(" ".join(rows))
+        return column.zoom(width, 1)
+    
+    def draw_3d_base(self, x, y, width, height):
+        self.canvas.create_rectangle(
+            x, y, x + width, y + height,
+            fill=self.base_color, outline=""
+        )
+        
+        self.canvas.create_polygon(
+            x, y, x + width, y, x + width - 10, y + 5, x + 10, y + 5,
+            fill="#3c5979", outline=""
+        )
+        
+        self.canvas.create_polygon(
+            x + width, y, x + width, y + height, x + width - 10, y + height - 5, x + width - 10, y + 5,
+            fill="#2c3e50", outline=""
+        )
+        
+        for i in range(int(x) + 20, int(x + width), 40):
+            self.canvas.create_line(
+                i, y + 5, i, y + height - 5,
+                fill="#2c3e50", width=2
+            )
+    
+    def draw_3d_tower(self, x, top, bottom, width):
+        self.canvas.create_rectangle(
+            x - width/2, top, x + width/2, bottom,
+            fill=self.tower_color, outline=""
+        )
+        
+        self.canvas.create_rectangle(
+            x - width/2, top, x - width/2 + 3, bottom,
+            fill="#95a5a6", outline=""
+        )
+        
+        self.canvas.create_rectangle(
+            x + width/2 - 3, top, x + width/2, bottom,
+            fill="#5d6d7e", outline=""
+        )
+        
+        self.canvas.create_oval(
+            x - width/2 - 5, top - 10, x + width/2 + 5, top + 10,
+            fill="#95a5a6", outline=""
+        )
+    
+    def draw_3d_disk(self, x, y, width, height, disk):
+        tags = ("disk", f"disk{disk}")
+        
+        sprite = self.disk_sprite(disk, width, height)
+        self.canvas.create_image(x - width/2 - height/4, y, image=sprite, anchor=tk.NW, tags=tags)
+        
+        if height >= LABEL_MIN_HEIGHT:
+            self.canvas.create_text(
+                x, y + height/2,
+                text=str(disk), fill="white", font=("Helvetica", 10, "bold"), tags=tags
+            )
+    
+    def disk_sprite(self, disk, width, height):
+        # Every disk has one size per layout and layout() sizes the cache for
+        # every disk drawn on its own, so nothing on screen is evicted.
+        key = (disk, round(width), round(height))
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        
+        sprite = self.render_disk(disk, *key[1:])
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.sprite_limit:
+            self.sprites.popitem(last=False)
+        return sprite
+    
+    def render_disk(self, disk, width, height):
+        # The body with a lighter top and darker bottom strip, between two
+        # elliptical caps. Pixels outside the caps are left transparent.
+        base_color = self.disk_colors[disk % len(self.disk_colors)]
+        highlight, shadow = self.shades[base_color]
+        
+        radius = height / 4
+        left, right = radius, radius + width
+        image = tk.PhotoImage(master=self.canvas, width=max(1, math.ceil(width + 2 * radius)), height=max(1, height))
+        
+        for row in range(height):
+            dy = (row + 0.5) / height * 2 - 1
+            half = radius * math.sqrt(max(0.0, 1 - dy * dy))
+            if row < height / 4:
+                body = highlight
+            elif row >= 3 * height / 4:
+                body = shadow
+            else:
+                body = base_color
+            
+            start = max(0, math.ceil(left - half - 0.5))
+            pixels = []
+            for column in range(start, math.floor(right + half - 0.5) + 1):
+                center = column + 0.5
+                if abs(center - right) <= half:
+                    pixels.append(shadow)
+                elif abs(center - left) <= half:
+                    pixels.append(highlight)
+                else:
+                    pixels.append(body)
+            if pixels:
+                image.put("{" + " ".join(pixels) + "}", to=(start, row))
+        return image
+
+class ParticleSystem:
+    # Positions and velocities live in flat arrays (numpy when it is installed,
+    # array.array otherwise) and are stepped together once per clock tick. The
+    # ovals are created once per burst and only moved with coords() after that.
+    def __init__(self, canvas, clock, colors, lifetime=1.6, gravity=360.0):
+        self.canvas = canvas
+        self.clock = clock
+        self.colors = colors
+        self.lifetime = lifetime
+        self.gravity = gravity
+        self.items = []
+        self.started_at = 0.0
+        self.last_step = 0.0
+        
+    def burst(self, count, width, height):
+        self.clear()
+        
+        if numpy is not None:
+            rng = numpy.random.default_rng()
+            self.x = rng.uniform(0, width, count)
+            self.y = rng.uniform(0, height, count)
+            self.vx = rng.uniform(-120, 120, count)
+            self.vy = rng.uniform(-180, -60, count)
+            self.half = rng.uniform(2.5, 7.5, count)
+        else:
+            self.x = array("d", (random.uniform(0, width) for _ in range(count)))
+            self.y = array("d", (random.uniform(0, height) for _ in range(count)))
+            self.vx = array("d", (random.uniform(-120, 120) for _ in range(count)))
+            self.vy = array("d", (random.uniform(-180, -60) for _ in range(count)))
+            self.half = array("d", (random.uniform(2.5, 7.5) for _ in range(count)))
+        
+        for x, y, half in zip(self.x, self.y, self.half):
+            self.items.append(self.canvas.create_oval(
+                x - half, y - half, x + half, y + half,
+                fill=random.choice(self.colors), outline="", tags="particle"
+            ))
+        
+        self.started_at = self.last_step = time.perf_counter()
+        self.clock.subscribe(self.step)
+        
+    def step(self, now):
+        if now - self.started_at >= self.lifetime:
+            self.clear()
+            return
+        
+        dt, self.last_step = now - self.last_step, now
+        if numpy is not None:
+            self.x += self.vx * dt
+            self.y += self.vy * dt
+            self.vy += self.gravity * dt
+            boxes = numpy.column_stack((self.x - self.half, self.y - self.half,
+                                        self.x + self.half, self.y + self.half)).tolist()
+        else:
+            self.x = array("d", map(lambda x, vx: x + vx * dt, self.x, self.vx))
+            self.y = array("d", map(lambda y, vy: y + vy * dt, self.y, self.vy))
+            self.vy = array("d", map(lambda vy: vy + self.gravity * dt, self.vy))
+            boxes = map(lambda x, y, half: (x - half, y - half, x + half, y + half), self.x, self.y, self.half)
+        
+        coords = self.canvas.coords
+        for item, box in zip(self.items, boxes):
+            coords(item, *box)
+        
+    def clear(self):
+        self.clock.unsubscribe(self.step)
+        if self.items:
+            self.canvas.delete("particle")
+            self.items = []
+
+def parse_board_specs(text):
+    # "6, 6/4, 6 adjacent": one board per item, each DISKS[/PEGS] [VARIANT].
+    boards = []
+    for item in text.split(","):
+        words = item.split()
+        if not words:
+            continue
+        if len(words) > 2:
+            raise ValueError(f"{item.strip()!r} should look like 6, 6/4 or 6 cyclic")
+        
+        disks, _, pegs = words[0].partition("/")
+        variant = words[1] if len(words) == 2 else "classic"
+        try:
+            disks, pegs = int(disks), int(pegs or 3)
+        except ValueError:
+            raise ValueError(f"{item.strip()!r} should look like 6, 6/4 or 6 cyclic")
+        if not 1 <= disks <= MAX_DISKS:
+            raise ValueError(f"disk counts must be between 1 and {MAX_DISKS}")
+        if not 3 <= pegs <= MAX_GUI_PEGS:
+            raise ValueError(f"peg counts must be between 3 and {MAX_GUI_PEGS}")
+        if variant not in VARIANTS:
+            raise ValueError(f"unknown variant {variant!r}; use one of {', '.join(VARIANTS)}")
+        
+        label = f"{disks} disks, {pegs} pegs" + (f", {variant}" if variant != "classic" else "")
+        boards.append((label, make_plan(disks, pegs, variant=variant)))
+    
+    if not boards:
+        raise ValueError("no boards given")
+    if len(boards) > MAX_COMPARE_BOARDS:
+        raise ValueError(f"at most {MAX_COMPARE_BOARDS} boards can be compared")
+    return boards
+
+class Board:
+    # A plan, its position, the disk in flight and a renderer on a canvas. It
+    # never schedules anything: the main window and the comparison window
+    # advance and draw their boards from the shared clock. A label, when
+    # given, is drawn in the corner with the move count. Boards lay out
+    # against the size stored by resize(), so a window being dragged does not
+    # rebuild the scene every tick; owners call it once the size settles.
+    def __init__(self, canvas, plan, renderer, frames, monitor, label=None):
+        self.canvas = canvas
+        self.plan = plan
+        self.renderer = renderer
+        self.frames = frames
+        self.monitor = monitor
+        self.label = label
+        self.label_item = None
+        self.size = None
+        self.reset()
+        
+    def resize(self):
+        self.size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        
+    def reset(self):
+        self.seek(0)
+        
+    def seek(self, move):
+        self.towers = self.plan.state_after(move)
+        self.current_move = move
+        self.move_source = None
+        self.disk_in_motion = None
+        self.motion_path = []
+        self.motion_frame = 0
+        self.motion_target = None
+        self.started_at = 0.0
+        self.dirty_pegs = set(range(self.plan.pegs))
+        
+    def finished(self):
+        return self.current_move >= self.plan.total and self.disk_in_motion is None
+        
+    def advance(self, now, speed, frame_time, deadline=None):
+        # Returns how many moves landed. A deadline means fast-forward: apply
+        # moves until then and only show the result.
+        if self.renderer.layout_key is None or self.finished():
+            return 0
+        if self.move_source is None:
+            self.move_source = self.plan.moves(start=self.current_move)
+            self.started_at = now
+        
+        before = self.current_move
+        if deadline is not None or speed < frame_time:
+            if self.disk_in_motion is not None:
+                self.land_move()
+                self.started_at = now
+            if deadline is not None:
+                while self.current_move < self.plan.total and time.perf_counter() < deadline:
+                    self.apply_moves(4096)
+                self.started_at = now
+            else:
+                due = int((now - self.started_at) / speed)
+                self.apply_moves(due)
+                self.started_at += due * speed
+            return self.current_move - before
+        
+        if self.disk_in_motion is None and not self.begin_move(now):
+            return 0
+        elapsed = now - self.started_at
+        if elapsed >= speed:
+            self.land_move()
+            if not self.begin_move(self.started_at + speed):
+                return self.current_move - before
+            elapsed = now - self.started_at
+        
+        frames = len(self.motion_path) - 1
+        self.motion_frame = min(int(elapsed / speed * frames), frames)
+        return self.current_move - before
+        
+    def apply_moves(self, count):
+        count = min(count, self.plan.total - self.current_move)
+        if count <= 0:
+            return
+        towers = self.towers
+        with self.monitor.section("apply_moves"):
+            for source, target in islice(self.move_source, count):
+                towers[target].append(towers[source].pop())
+        self.current_move += count
+        self.dirty_pegs = set(range(self.plan.pegs))
+        
+    def begin_move(self, started_at):
+        move = next(self.move_source, None)
+        if move is None:
+            return False
+        
+        source, target = move
+        self.disk_in_motion = self.towers[source].pop()
+        self.dirty_pegs.add(source)
+        self.motion_target = target
+        self.motion_path = self.renderer.motion_path(
+            self.renderer.slot(source, len(self.towers[source])),
+            self.renderer.slot(target, len(self.towers[target])),
+            self.frames
+        )
+        self.motion_frame = 0
+        self.started_at = started_at
+        return True
+        
+    def land_move(self):
+        self.towers[self.motion_target].append(self.disk_in_motion)
+        self.dirty_pegs.add(self.motion_target)
+        self.disk_in_motion = None
+        self.current_move += 1
+        
+    def draw(self):
+        if self.size is None or min(self.size) < 50:
+            self.resize()
+        width, height = self.size
+        if width < 50 or height < 50:
+            return
+        
+        dirty_pegs, self.dirty_pegs = self.dirty_pegs, set()
+        if self.renderer.layout(width, height, self.plan.disks, self.plan.pegs):
+            self.renderer.build(self.towers)
+            if self.label is not None:
+                self.label_item = self.canvas.create_text(10, 10, anchor=tk.NW, fill="white", font=("Helvetica", 11, "bold"))
+        elif dirty_pegs:
+            self.renderer.sync(self.towers, dirty_pegs)
+        
+        if self.disk_in_motion is not None and self.motion_frame < len(self.motion_path):
+            self.renderer.place_disk(self.disk_in_motion, *self.motion_path[self.motion_frame])
+            self.renderer.raise_disk(self.disk_in_motion)
+        
+        if self.label is not None:
+            self.canvas.itemconfig(self.label_item, text=f"{self.label}    {format_count(self.current_move)}/{format_count(self.plan.total)}")
+
+class ComparisonWindow:
+    # Several boards in one window, advanced together by the main window's
+    # FrameClock: each tick moves every board, then draws every board, and Tk
+    # repaints them all in the same idle pass. Speed and fast-forward follow
+    # the main window's controls.
+    def __init__(self, app, boards):
+        self.app = app
+        self.running = False
+        self.paused_at = None
+        self.resize_job = None
+        
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Compare Solvers")
+        self.window.geometry("1200x700")
+        self.window.configure(bg="#1e272e")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        control_frame = tk.Frame(self.window, bg="#1e272e")
+        control_frame.pack(fill=tk.X, padx=20, pady=(20, 10))
+        
+        self.start_button = tk.Button(control_frame, text="Start", bg="#2ecc71", fg="white",
+                                      font=("Helvetica", 12, "bold"), command=self.toggle_running,
+                                      relief=tk.FLAT, padx=15, pady=5)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        
+        reset_button = tk.Button(control_frame, text="Reset", bg="#e74c3c", fg="white",
+                                 font=("Helvetica", 12, "bold"), command=self.reset,
+                                 relief=tk.FLAT, padx=15, pady=5)
+        reset_button.pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = tk.Label(control_frame, text="Ready", bg="#1e272e", fg="white", font=("Helvetica", 12))
+        self.status_label.pack(side=tk.RIGHT)
+        
+        grid = tk.Frame(self.window, bg="#1e272e")
+        grid.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 20))
+        
+        columns = math.ceil(math.sqrt(len(boards)))
+        rows = math.ceil(len(boards) / columns)
+        for column in range(columns):
+            grid.columnconfigure(column, weight=1, uniform="board")
+        for row in range(rows):
+            grid.rowconfigure(row, weight=1, uniform="board")
+        
+        self.boards = []
+        for index, (label, plan) in enumerate(boards):
+            canvas = tk.Canvas(grid, bg="#1e272e", highlightthickness=0)
+            canvas.grid(row=index // columns, column=index % columns, sticky="nsew", padx=4, pady=4)
+            renderer = HanoiRenderer(canvas, app.tower_color, app.base_color, app.disk_colors)
+            self.boards.append(Board(canvas, plan, renderer, app.animation_frames, app.perf, label))
+        
+        self.window.bind("<Configure>", self.on_resize)
+        
+    def on_resize(self, event):
+        if event.widget == self.window:
+            if self.resize_job is not None:
+                self.window.after_cancel(self.resize_job)
+            self.resize_job = self.window.after(100, self.finish_resize)
+        
+    def finish_resize(self):
+        self.resize_job = None
+        for board in self.boards:
+            board.resize()
+        self.draw()
+        
+    def draw(self):
+        for board in self.boards:
+            board.draw()
+        
+    def toggle_running(self):
+        if not self.running:
+            if all(board.finished() for board in self.boards):
+                for board in self.boards:
+                    board.reset()
+            elif self.paused_at is not None:
+                paused_for = time.perf_counter() - self.paused_at
+                for board in self.boards:
+                    board.started_at += paused_for
+            self.paused_at = None
+            self.running = True
+            self.start_button.config(text="Pause")
+            self.status_label.config(text="Running...")
+            self.app.clock.subscribe(self.tick)
+        else:
+            self.app.clock.unsubscribe(self.tick)
+            self.running = False
+            self.paused_at = time.perf_counter()
+            self.start_button.config(text="Resume")
+            self.status_label.config(text="Paused")
+        
+    def reset(self):
+        self.app.clock.unsubscribe(self.tick)
+        self.running = False
+        self.paused_at = None
+        self.start_button.config(text="Start")
+        self.status_label.config(text="Ready")
+        for board in self.boards:
+            board.reset()
+            board.renderer.invalidate()
+        self.draw()
+        
+    def tick(self, now):
+        active = [board for board in self.boards if not board.finished()]
+        deadline = None
+        
+        with self.app.perf.section("compare"):
+            moves = 0
+            for board in active:
+                if self.app.turbo_var.get():
+                    # Active boards split the fast-forward budget evenly.
+                    deadline = time.perf_counter() + self.app.frame_time * 0.75 / len(active)
+                moves += board.advance(now, self.app.animation_speed, self.app.frame_time, deadline)
+            for board in self.boards:
+                board.draw()
+        self.app.perf.count_moves(moves)
+        
+        if all(board.finished() for board in self.boards):
+            self.app.clock.unsubscribe(self.tick)
+            self.running = False
+            self.start_button.config(text="Start")
+            self.status_label.config(text="Completed!")
+        
+    def close(self):
+        self.app.clock.unsubscribe(self.tick)
+        self.window.destroy()
 
 class TowerOfHanoi:
     def __init__(self, root):
@@ -15,15 +753,26 @@ class TowerOfHanoi:
         self.set_theme()
         
         self.disk_count = 3
+        self.peg_count = 3
+        self.variant = "classic"
+        self.plan = None
+        self.planning = None
+        self.start_when_planned = False
+        self.start_state = None
+        self.goal_state = None
+        self.edit_mode = None
+        self.selected_peg = None
         self.animation_speed = 0.5
         self.is_running = False
         self.pause_execution = False
         self.total_moves = 0
-        self.current_move = 0
-        self.move_history = []
+        self.board = None
         self.animation_in_progress = False
         self.fps = 60
         self.frame_time = 1.0 / self.fps
+        self.perf = PerfMonitor()
+        self.clock = FrameClock(root, self.fps, self.perf)
+        self.paused_at = 0.0
         
         self.tower_color = "#7f8c8d"
         self.base_color = "#34495e"
@@ -31,13 +780,12 @@ class TowerOfHanoi:
                           "#1abc9c", "#d35400", "#c0392b", "#16a085", "#8e44ad"]
         
         self.animation_frames = 30
-        self.disk_in_motion = None
-        self.disk_motion_path = []
-        self.disk_motion_frame = 0
-        
-        self.towers = [[], [], []]
+        self.resize_job = None
         
         self.create_ui()
+        self.renderer = HanoiRenderer(self.canvas, self.tower_color, self.base_color, self.disk_colors)
+        self.hud = PerfHud(self.canvas, self.perf)
+        self.particles = ParticleSystem(self.canvas, self.clock, self.disk_colors)
         self.initialize_towers()
         self.draw_towers()
         
@@ -83,10 +831,26 @@ class TowerOfHanoi:
         disk_label.pack(side=tk.LEFT, padx=(0, 10))
         
         self.disk_var = tk.StringVar(value=str(self.disk_count))
-        disk_combobox = ttk.Combobox(control_frame, textvariable=self.disk_var, values=[str(i) for i in range(1, 11)], width=5, style='TCombobox')
+        disk_combobox = ttk.Combobox(control_frame, textvariable=self.disk_var, values=[str(i) for i in DISK_CHOICES if i <= MAX_DISKS], width=5, style='TCombobox')
         disk_combobox.pack(side=tk.LEFT, padx=(0, 20))
         disk_combobox.bind("<<ComboboxSelected>>", self.change_disk_count)
         
+        peg_label = tk.Label(control_frame, text="Pegs:", bg="#1e272e", fg="white", font=("Helvetica", 12))
+        peg_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.peg_var = tk.StringVar(value=str(self.peg_count))
+        self.peg_combobox = ttk.Combobox(control_frame, textvariable=self.peg_var, values=[str(i) for i in range(3, MAX_GUI_PEGS + 1)], width=3, state="readonly", style='TCombobox')
+        self.peg_combobox.pack(side=tk.LEFT, padx=(0, 20))
+        self.peg_combobox.bind("<<ComboboxSelected>>", self.change_peg_count)
+        
+        variant_label = tk.Label(control_frame, text="Variant:", bg="#1e272e", fg="white", font=("Helvetica", 12))
+        variant_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.variant_var = tk.StringVar(value=self.variant)
+        variant_combobox = ttk.Combobox(control_frame, textvariable=self.variant_var, values=list(VARIANTS), width=9, state="readonly", style='TCombobox')
+        variant_combobox.pack(side=tk.LEFT, padx=(0, 20))
+        variant_combobox.bind("<<ComboboxSelected>>", self.change_variant)
+        
         speed_label = tk.Label(control_frame, text="Animation Speed:", bg="#1e272e", fg="white", font=("Helvetica", 12))
         speed_label.pack(side=tk.LEFT, padx=(0, 10))
         
@@ -103,9 +867,25 @@ class TowerOfHanoi:
         
         self.speed_scale.config(command=update_speed_label)
         
+        self.turbo_var = tk.BooleanVar(value=False)
+        turbo_check = tk.Checkbutton(control_frame, text="Fast-forward", variable=self.turbo_var,
+                                     bg="#1e272e", fg="white", selectcolor="#34495e",
+                                     activebackground="#1e272e", activeforeground="white", font=("Helvetica", 12))
+        turbo_check.pack(side=tk.LEFT, padx=(0, 20))
+        
         button_frame = tk.Frame(control_frame, bg="#1e272e")
         button_frame.pack(side=tk.RIGHT)
         
+        self.edit_start_button = tk.Button(button_frame, text="Edit Start", bg="#9b59b6", fg="white", 
+                                     font=("Helvetica", 12, "bold"), command=lambda: self.toggle_edit("start"),
+                                     relief=tk.FLAT, padx=15, pady=5)
+        self.edit_start_button.pack(side=tk.LEFT, padx=5)
+        
+        self.edit_goal_button = tk.Button(button_frame, text="Edit Goal", bg="#9b59b6", fg="white", 
+                                     font=("Helvetica", 12, "bold"), command=lambda: self.toggle_edit("goal"),
+                                     relief=tk.FLAT, padx=15, pady=5)
+        self.edit_goal_button.pack(side=tk.LEFT, padx=5)
+        
         self.start_button = tk.Button(button_frame, text="Start", bg="#2ecc71", fg="white", 
                                      font=("Helvetica", 12, "bold"), command=self.start_solver,
                                      relief=tk.FLAT, padx=15, pady=5)
@@ -121,6 +901,11 @@ class TowerOfHanoi:
                                      relief=tk.FLAT, padx=15, pady=5)
         self.reset_button.pack(side=tk.LEFT, padx=5)
         
+        compare_button = tk.Button(button_frame, text="Compare", bg="#1abc9c", fg="white",
+                                   font=("Helvetica", 12, "bold"), command=self.open_comparison,
+                                   relief=tk.FLAT, padx=15, pady=5)
+        compare_button.pack(side=tk.LEFT, padx=5)
+        
         status_frame = tk.Frame(main_frame, bg="#1e272e")
         status_frame.pack(fill=tk.X, pady=(0, 10))
         
@@ -130,11 +915,32 @@ class TowerOfHanoi:
         self.status_label = tk.Label(status_frame, text="Ready", bg="#1e272e", fg="white", font=("Helvetica", 12))
         self.status_label.pack(side=tk.RIGHT)
         
+        timeline_frame = tk.Frame(main_frame, bg="#1e272e")
+        timeline_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        timeline_label = tk.Label(timeline_frame, text="Timeline:", bg="#1e272e", fg="white", font=("Helvetica", 12))
+        timeline_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.timeline_var = tk.DoubleVar(value=0)
+        self.timeline_scale = ttk.Scale(timeline_frame, from_=0, to=1, orient=tk.HORIZONTAL, variable=self.timeline_var,
+                                        command=self.scrub_timeline, style='TScale')
+        self.timeline_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        goto_label = tk.Label(timeline_frame, text="Go to move:", bg="#1e272e", fg="white", font=("Helvetica", 10))
+        goto_label.pack(side=tk.LEFT, padx=(20, 5))
+        
+        self.goto_var = tk.StringVar(value="0")
+        self.goto_entry = tk.Entry(timeline_frame, textvariable=self.goto_var, width=22, bg="#34495e", fg="white",
+                                   insertbackground="white", relief=tk.FLAT)
+        self.goto_entry.pack(side=tk.LEFT)
+        self.goto_entry.bind("<Return>", self.goto_move)
+        
         self.canvas_frame = tk.Frame(main_frame, bg="#1e272e")
         self.canvas_frame.pack(fill=tk.BOTH, expand=True)
         
         self.canvas = tk.Canvas(self.canvas_frame, bg="#1e272e", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
         
         info_frame = tk.Frame(main_frame, bg="#2c3e50", padx=15, pady=15, relief=tk.FLAT)
         info_frame.pack(fill=tk.X, pady=(15, 0))
@@ -151,213 +957,312 @@ class TowerOfHanoi:
                              bg="#2c3e50", fg="white", font=("Helvetica", 10), wraplength=1150, justify=tk.LEFT)
         rules_text.pack(anchor=tk.W, pady=(5, 0))
         
-        ai_text = tk.Label(info_frame, text="This solver uses a recursive algorithm to find the optimal solution with the minimum number of moves (2ⁿ-1 moves for n disks).",
+        ai_text = tk.Label(info_frame, text="This solver uses a recursive algorithm to find the optimal solution with the minimum number of moves (2ⁿ-1 moves for n disks on three pegs, and the Frame-Stewart algorithm for four or more). The adjacent variant only moves disks between neighbouring pegs (3ⁿ-1 moves) and the cyclic variant only moves them clockwise.",
                           bg="#2c3e50", fg="white", font=("Helvetica", 10), wraplength=1150, justify=tk.LEFT)
         ai_text.pack(anchor=tk.W, pady=(5, 0))
         
         self.root.bind("<Configure>", self.on_resize)
-        
-    def on_resize(self, event):
-        if event.widget == self.root:
-            self.draw_towers()
-        
-    def initialize_towers(self):
-        self.towers = [[], [], []]
-        
-        for i in range(self.disk_count, 0, -1):
-            self.towers[0].append(i)
-            
-        self.total_moves = (2 ** self.disk_count) - 1
-        self.move_label.config(text=f"Moves: 0/{self.total_moves}")
-        self.current_move = 0
-        self.move_history = []
-        
-    def draw_towers(self):
-        self.canvas.delete("all")
-        
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        if canvas_width < 50 or canvas_height < 50:
-            return
-            
-        tower_width = 20
-        tower_height = canvas_height * 0.7
-        tower_spacing = canvas_width / 4
-        tower_bottom = canvas_height * 0.8
-        tower_top = tower_bottom - tower_height
-        
-        self.draw_background(canvas_width, canvas_height)
-        
-        base_width = tower_spacing * 3
-        base_height = 30
-        base_left = tower_spacing - base_width/2
-        base_top = tower_bottom
-        
-        self.draw_3d_base(base_left, base_top, base_width, base_height)
-        
-        for i in range(3):
-            tower_x = tower_spacing * (i + 1)
-            
-            self.draw_3d_tower(tower_x, tower_top, tower_bottom, tower_width)
-            
-            tower_name = ["Source", "Auxiliary", "Target"][i]
-            self.canvas.create_text(
-                tower_x, tower_bottom + base_height + 20,
-                text=tower_name, fill="white", font=("Helvetica", 12, "bold")
-            )
-            
-            max_disk_width = tower_spacing * 0.8
-            disk_height = min(30, tower_height / (self.disk_count + 2))
-            
-            for j, disk in enumerate(self.towers[i]):
-                disk_width = max_disk_width * (disk / self.disk_count)
-                disk_top = tower_bottom - (j + 1) * disk_height
-                
-                self.draw_3d_disk(tower_x, disk_top, disk_width, disk_height, disk)
-        
-        if self.disk_in_motion is not None and self.disk_motion_path and self.disk_motion_frame < len(self.disk_motion_path):
-            disk = self.disk_in_motion
-            pos = self.disk_motion_path[self.disk_motion_frame]
-            max_disk_width = tower_spacing * 0.8
-            disk_width = max_disk_width * (disk / self.disk_count)
-            disk_height = min(30, tower_height / (self.disk_count + 2))
-            
-            self.draw_3d_disk(pos[0], pos[1], disk_width, disk_height, disk)
-    
-    def draw_background(self, width, height):
-        for i in range(height):
-            r = int(30 + (i / height) * 10)
-            g = int(39 + (i / height) * 15)
-            b = int(46 + (i / height) * 20)
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            
-            self.canvas.create_line(0, i, width, i, fill=color)
-    
-    def draw_3d_base(self, x, y, width, height):
-        self.canvas.create_rectangle(
-            x, y, x + width, y + height,
-            fill=self.base_color, outline=""
+        self.root.bind("<F3>", lambda event: self.hud.toggle())
+        self.root.bind("<F4>", self.export_trace)
+        self.root.after(500, self.sample_perf)
+        
+    def sample_perf(self):
+        self.perf.gauge("canvas_items", len(self.canvas.find_all()))
+        self.perf.gauge("pending_after", len(self.root.tk.call("after", "info")))
+        self.perf.sample_moves()
+        self.hud.update()
+        self.root.after(500, self.sample_perf)
+        
+    def open_comparison(self):
+        spec = simpledialog.askstring(
+            "Compare Solvers",
+            "Boards to compare, separated by commas.\nEach is DISKS[/PEGS] [VARIANT], e.g. 6, 6/4, 6 adjacent",
+            initialvalue=f"{self.disk_count}, {self.disk_count}/4, {self.disk_count} cyclic", parent=self.root
         )
+        if not spec:
+            return
         
-        self.canvas.create_polygon(
-            x, y, x + width, y, x + width - 10, y + 5, x + 10, y + 5,
-            fill="#3c5979", outline=""
-        )
+        try:
+            boards = parse_board_specs(spec)
+        except ValueError as error:
+            messagebox.showwarning("Invalid Boards", str(error))
+            return
+        ComparisonWindow(self, boards).draw()
         
-        self.canvas.create_polygon(
-            x + width, y, x + width, y + height, x + width - 10, y + height - 5, x + width - 10, y + 5,
-            fill="#2c3e50", outline=""
-        )
+    def export_trace(self, event=None):
+        path = filedialog.asksaveasfilename(title="Export performance trace", defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path:
+            count = self.perf.export_trace(path)
+            self.status_label.config(text=f"Trace saved ({count} events)")
         
-        for i in range(int(x) + 20, int(x + width), 40):
-            self.canvas.create_line(
-                i, y + 5, i, y + height - 5,
-                fill="#2c3e50", width=2
-            )
-    
-    def draw_3d_tower(self, x, top, bottom, width):
-        self.canvas.create_rectangle(
-            x - width/2, top, x + width/2, bottom,
-            fill=self.tower_color, outline=""
-        )
+    def on_resize(self, event):
+        if event.widget == self.root:
+            if self.resize_job is not None:
+                self.root.after_cancel(self.resize_job)
+            self.resize_job = self.root.after(100, self.finish_resize)
         
-        self.canvas.create_rectangle(
-            x - width/2, top, x - width/2 + 3, bottom,
-            fill="#95a5a6", outline=""
-        )
+    def finish_resize(self):
+        self.resize_job = None
+        self.board.resize()
+        self.draw_towers()
         
-        self.canvas.create_rectangle(
-            x + width/2 - 3, top, x + width/2, bottom,
-            fill="#5d6d7e", outline=""
-        )
+    def initialize_towers(self):
+        args = (self.disk_count, self.peg_count, self.start_state, self.goal_state, self.variant)
+        self.planning = None
+        self.start_when_planned = False
+        if closed_form(*args):
+            future = Future()
+            plan_in_background(future, *args)
+            self.use_plan(future)
+            return
         
-        self.canvas.create_oval(
-            x - width/2 - 5, top - 10, x + width/2 + 5, top + 10,
-            fill="#95a5a6", outline=""
-        )
-    
-    def draw_3d_disk(self, x, y, width, height, disk):
-        base_color = self.disk_colors[disk % len(self.disk_colors)]
+        # Distance tables and searches take up to seconds, so they run on a
+        # worker thread; the board keeps showing the edited position and the
+        # controls stay off until poll_plan() finds the plan ready.
+        self.planning = Future()
+        threading.Thread(target=plan_in_background, args=(self.planning, *args), daemon=True).start()
+        self.start_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Planning...")
+        self.timeline_scale.state(["disabled"])
+        self.goto_entry.config(state=tk.DISABLED)
+        self.edit_start_button.config(state=tk.DISABLED)
+        self.edit_goal_button.config(state=tk.DISABLED)
+        self.root.after(PLAN_POLL_MS, self.poll_plan, self.planning)
+        
+    def poll_plan(self, future):
+        if future is not self.planning:
+            return
+        if not future.done():
+            self.root.after(PLAN_POLL_MS, self.poll_plan, future)
+            return
         
-        r = int(base_color[1:3], 16)
-        g = int(base_color[3:5], 16)
-        b = int(base_color[5:7], 16)
+        self.planning = None
+        self.start_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Ready")
+        self.timeline_scale.state(["!disabled"])
+        self.goto_entry.config(state=tk.NORMAL)
+        self.edit_start_button.config(state=self.edit_state())
+        self.edit_goal_button.config(state=self.edit_state())
+        self.use_plan(future)
+        self.draw_towers()
+        if self.start_when_planned:
+            self.start_solver()
         
-        highlight = f"#{min(r+30, 255):02x}{min(g+30, 255):02x}{min(b+30, 255):02x}"
-        shadow = f"#{max(r-30, 0):02x}{max(g-30, 0):02x}{max(b-30, 0):02x}"
+    def use_plan(self, future):
+        try:
+            self.plan = future.result()
+        except ValueError as error:
+            messagebox.showwarning("Cannot Solve", f"{error}. Using the standard start and goal instead.")
+            self.start_state = self.goal_state = None
+            self.plan = make_plan(self.disk_count, self.peg_count, variant=self.variant)
+        self.board = Board(self.canvas, self.plan, self.renderer, self.animation_frames, self.perf)
+        
+        self.total_moves = self.plan.total
+        self.move_label.config(text=f"Moves: 0/{format_count(self.total_moves)}")
+        
+        self.timeline_scale.config(to=max(min(self.total_moves, TIMELINE_STEPS), 1))
+        self.timeline_var.set(0)
+        self.goto_var.set("0")
+        
+    def seek(self, move):
+        move = max(0, min(move, self.total_moves))
+        self.board.seek(move)
+        
+        self.show_progress()
+        self.goto_var.set(str(move))
+        self.draw_towers()
         
-        self.canvas.create_rectangle(
-            x - width/2, y, x + width/2, y + height,
-            fill=base_color, outline=""
-        )
+    def show_progress(self):
+        self.move_label.config(text=f"Moves: {format_count(self.board.current_move)}/{format_count(self.total_moves)}")
+        if self.total_moves > TIMELINE_STEPS:
+            self.timeline_var.set(self.board.current_move * TIMELINE_STEPS // self.total_moves)
+        else:
+            self.timeline_var.set(self.board.current_move)
         
-        self.canvas.create_rectangle(
-            x - width/2, y, x + width/2, y + height/4,
-            fill=highlight, outline=""
-        )
+    def scrub_timeline(self, value):
+        if self.is_running and not self.pause_execution or self.edit_mode or self.planning is not None:
+            return
         
-        self.canvas.create_rectangle(
-            x - width/2, y + 3*height/4, x + width/2, y + height,
-            fill=shadow, outline=""
-        )
+        move = int(round(float(value)))
+        if self.total_moves > TIMELINE_STEPS:
+            move = move * self.total_moves // TIMELINE_STEPS
+        if move != self.board.current_move:
+            self.seek(move)
         
-        self.canvas.create_oval(
-            x - width/2 - height/4, y, x - width/2 + height/4, y + height,
-            fill=highlight, outline=""
-        )
+    def goto_move(self, event=None):
+        if self.is_running and not self.pause_execution or self.edit_mode or self.planning is not None:
+            return
         
-        self.canvas.create_oval(
-            x + width/2 - height/4, y, x + width/2 + height/4, y + height,
-            fill=shadow, outline=""
-        )
+        try:
+            self.seek(int(self.goto_var.get()))
+        except ValueError:
+            messagebox.showwarning("Invalid Input", "Please enter a valid move number.")
+            self.goto_var.set(str(self.board.current_move))
         
-        self.canvas.create_text(
-            x, y + height/2,
-            text=str(disk), fill="white", font=("Helvetica", 10, "bold")
-        )
+    def draw_towers(self):
+        with self.perf.section("draw"):
+            self.board.draw()
     
     def change_disk_count(self, event=None):
         try:
             new_count = int(self.disk_var.get())
-            if 1 <= new_count <= 10:
+            if 1 <= new_count <= MAX_DISKS:
                 self.disk_count = new_count
+                self.start_state = self.goal_state = None
                 self.reset()
             else:
-                messagebox.showwarning("Invalid Input", "Please enter a number between 1 and 10.")
+                messagebox.showwarning("Invalid Input", f"Please enter a number between 1 and {MAX_DISKS}.")
                 self.disk_var.set(str(self.disk_count))
         except ValueError:
             messagebox.showwarning("Invalid Input", "Please enter a valid number.")
             self.disk_var.set(str(self.disk_count))
     
+    def change_peg_count(self, event=None):
+        self.peg_count = int(self.peg_var.get())
+        self.start_state = self.goal_state = None
+        self.reset()
+    
+    def change_variant(self, event=None):
+        # The restricted variants are defined on three pegs only.
+        self.variant = self.variant_var.get()
+        if self.variant != "classic":
+            self.peg_count = 3
+            self.peg_var.set("3")
+            self.peg_combobox.config(state=tk.DISABLED)
+        else:
+            self.peg_combobox.config(state="readonly")
+        if self.edit_state() == tk.DISABLED:
+            self.start_state = self.goal_state = None
+        self.reset()
+    
+    def edit_state(self):
+        # Custom positions are planned off the Tk thread, but only a distance
+        # table is sure to be ready within seconds; the bidirectional search
+        # may run far longer, so editing is offered only where a table fits.
+        if quick_to_plan(self.disk_count, self.peg_count, self.variant):
+            return tk.NORMAL
+        return tk.DISABLED
+    
+    def toggle_edit(self, mode):
+        if self.is_running or self.edit_state() == tk.DISABLED:
+            return
+        
+        if self.edit_mode is not None:
+            finished = self.edit_mode
+            self.finish_edit()
+            if finished == mode:
+                return
+        
+        self.edit_mode = mode
+        self.selected_peg = None
+        if mode == "start":
+            self.seek(0)
+            self.edit_start_button.config(text="Done")
+            self.status_label.config(text="Editing start: click a peg to lift its top disk, then click a peg to drop it")
+        else:
+            self.seek(self.total_moves)
+            self.edit_goal_button.config(text="Done")
+            self.status_label.config(text="Editing goal: click a peg to lift its top disk, then click a peg to drop it")
+    
+    def finish_edit(self):
+        if self.selected_peg is not None:
+            self.drop_disk(self.selected_peg)
+        
+        state = pegs_from_towers(self.board.towers)
+        if self.edit_mode == "start":
+            self.start_state = state
+        else:
+            self.goal_state = state
+        
+        self.edit_mode = None
+        self.edit_start_button.config(text="Edit Start")
+        self.edit_goal_button.config(text="Edit Goal")
+        self.reset()
+    
+    def on_canvas_click(self, event):
+        if self.edit_mode is None or self.renderer.layout_key is None:
+            return
+        
+        peg = self.renderer.peg_at(event.x)
+        towers = self.board.towers
+        if self.selected_peg is None:
+            if towers[peg]:
+                self.selected_peg = peg
+                disk = towers[peg][-1]
+                x = self.renderer.tower_x(peg)
+                y = self.renderer.tower_top - self.renderer.disk_height - 10
+                self.renderer.place_disk(disk, x, y)
+                self.renderer.raise_disk(disk)
+        else:
+            self.drop_disk(peg)
+    
+    def drop_disk(self, peg):
+        source = self.selected_peg
+        towers = self.board.towers
+        disk = towers[source][-1]
+        self.selected_peg = None
+        
+        if peg != source and towers[peg] and towers[peg][-1] < disk:
+            self.status_label.config(text=f"Disk {disk} cannot go on the smaller disk {towers[peg][-1]}")
+            peg = source
+        elif peg != source:
+            towers[peg].append(towers[source].pop())
+        
+        self.board.dirty_pegs.update((source, peg))
+        self.draw_towers()
+    
     def change_speed(self, event=None):
         self.animation_speed = round(float(self.speed_scale.get()), 1)
         self.speed_value.config(text=f"{self.animation_speed:.1f}s")
     
     def start_solver(self):
         if not self.is_running:
+            # Finishing an edit resets the board, so it has to happen before
+            # any of the running state below is set.
+            if self.edit_mode is not None:
+                self.finish_edit()
+            if self.planning is not None:
+                self.start_when_planned = True
+                return
+            
             self.is_running = True
             self.pause_execution = False
             self.start_button.config(state=tk.DISABLED)
             self.pause_button.config(state=tk.NORMAL, text="Pause")
             self.reset_button.config(state=tk.DISABLED)
             self.status_label.config(text="Running...")
+            self.timeline_scale.state(["disabled"])
+            self.goto_entry.config(state=tk.DISABLED)
+            self.edit_start_button.config(state=tk.DISABLED)
+            self.edit_goal_button.config(state=tk.DISABLED)
             
-            self.move_history = []
-            self.hanoi_recursive(self.disk_count, 0, 2, 1)
+            if self.board.current_move >= self.total_moves:
+                self.seek(0)
             
-            threading.Thread(target=self.animate_solution, daemon=True).start()
+            self.board.move_source = None
+            self.clock.subscribe(self.advance_animation)
     
     def toggle_pause(self):
         self.pause_execution = not self.pause_execution
         if self.pause_execution:
+            self.paused_at = time.perf_counter()
+            self.clock.unsubscribe(self.advance_animation)
             self.pause_button.config(text="Resume")
             self.status_label.config(text="Paused")
+            self.timeline_scale.state(["!disabled"])
+            self.goto_entry.config(state=tk.NORMAL)
         else:
-            self.pause_button.config(text="Resume")
+            self.board.started_at += time.perf_counter() - self.paused_at
+            self.pause_button.config(text="Pause")
             self.status_label.config(text="Running...")
+            self.timeline_scale.state(["disabled"])
+            self.goto_entry.config(state=tk.DISABLED)
+            self.clock.subscribe(self.advance_animation)
     
     def reset(self):
+        self.clock.unsubscribe(self.advance_animation)
+        self.particles.clear()
         if self.is_running:
             self.is_running = False
             self.pause_execution = False
@@ -366,143 +1271,63 @@ class TowerOfHanoi:
         self.pause_button.config(state=tk.DISABLED)
         self.reset_button.config(state=tk.NORMAL)
         self.status_label.config(text="Ready")
+        self.timeline_scale.state(["!disabled"])
+        self.goto_entry.config(state=tk.NORMAL)
+        self.edit_start_button.config(state=self.edit_state())
+        self.edit_goal_button.config(state=self.edit_state())
         
         self.initialize_towers()
         self.draw_towers()
     
-    def hanoi_recursive(self, n, source, target, auxiliary):
-        if n > 0:
-            self.hanoi_recursive(n-1, source, auxiliary, target)
-            
-            self.move_history.append((source, target))
-            
-            self.hanoi_recursive(n-1, auxiliary, target, source)
-    
-    def calculate_motion_path(self, source_tower, target_tower, disk):
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        tower_spacing = canvas_width / 4
-        tower_bottom = canvas_height * 0.8
-        source_x = tower_spacing * (source_tower + 1)
-        target_x = tower_spacing * (target_tower + 1)
-        
-        max_disk_width = tower_spacing * 0.8
-        disk_height = min(30, canvas_height * 0.7 / (self.disk_count + 2))
-        
-        source_y = tower_bottom - len(self.towers[source_tower]) * disk_height
-        
-        target_y = tower_bottom - len(self.towers[target_tower]) * disk_height
-        
-        control_y = min(source_y, target_y) - 100
-        
-        path = []
-        steps = self.animation_frames
+    def advance_animation(self, now):
+        deadline = None
+        if self.turbo_var.get():
+            # Fast-forward: spend most of the frame applying moves, then draw once.
+            deadline = now + self.frame_time * 0.75
+        
+        moves = self.board.advance(now, self.animation_speed, self.frame_time, deadline)
+        self.perf.count_moves(moves)
+        if moves:
+            self.show_progress()
+        self.draw_towers()
         
-        for i in range(steps + 1):
-            t = i / steps
-            x = (1-t)*2 * source_x + 2*(1-t)*t * ((source_x + target_x)/2) + t*2 * target_x
-            y = (1-t)*2 * source_y + 2*(1-t)*t * control_y + t*2 * target_y
-            path.append((x, y))
-            
-        return path
+        if self.board.finished():
+            self.finish_solver()
     
-    def animate_solution(self):
-        self.current_move = 0
-        self.towers = [[], [], []]
-        
-        for i in range(self.disk_count, 0, -1):
-            self.towers[0].append(i)
-        
-        self.root.after(0, self.draw_towers)
+    def finish_solver(self):
+        self.clock.unsubscribe(self.advance_animation)
+        self.is_running = False
         
-        for source, target in self.move_history:
-            while self.pause_execution and self.is_running:
-                time.sleep(0.1)
-                
-            if not self.is_running:
-                break
-                
-            self.current_move += 1
-            self.root.after(0, lambda m=self.current_move: self.move_label.config(text=f"Moves: {m}/{self.total_moves}"))
-            
-            disk = self.towers[source].pop()
-            
-            self.disk_in_motion = disk
-            self.disk_motion_path = self.calculate_motion_path(source, target, disk)
-            self.disk_motion_frame = 0
-            
-            start_time = time.time()
-            for frame in range(len(self.disk_motion_path)):
-                while self.pause_execution and self.is_running:
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    break
-                
-                self.disk_motion_frame = frame
-                
-                self.root.after(0, self.draw_towers)
-                
-                frame_end_time = start_time + (frame + 1) * (self.animation_speed / len(self.disk_motion_path))
-                current_time = time.time()
-                
-                if current_time < frame_end_time:
-                    time.sleep(frame_end_time - current_time)
-            
-            self.towers[target].append(disk)
-            self.disk_in_motion = None
-            
-            self.root.after(0, self.draw_towers)
+        self.status_label.config(text="Completed!")
+        self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED)
+        self.reset_button.config(state=tk.NORMAL)
+        self.timeline_scale.state(["!disabled"])
+        self.goto_entry.config(state=tk.NORMAL)
+        self.goto_var.set(str(self.board.current_move))
+        self.edit_start_button.config(state=self.edit_state())
+        self.edit_goal_button.config(state=self.edit_state())
         
-        if self.is_running:
-            self.is_running = False
-            self.root.after(0, lambda: self.status_label.config(text="Completed!"))
-            self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.pause_button.config(state=tk.DISABLED))
-            self.root.after(0, lambda: self.reset_button.config(state=tk.NORMAL))
-            
-            self.celebration_effect()
+        self.celebration_effect()
     
     def celebration_effect(self):
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        particles = []
-        for _ in range(50):
-            x = random.randint(0, canvas_width)
-            y = random.randint(0, canvas_height)
-            color = random.choice(self.disk_colors)
-            size = random.randint(5, 15)
-            speed_x = random.uniform(-2, 2)
-            speed_y = random.uniform(-3, -1)
-            particles.append([x, y, color, size, speed_x, speed_y])
-        
-        def animate_particles(step=0):
-            if step >= 100:
-                return
-            
-            self.canvas.delete("particle")
-            
-            for p in particles:
-                p[0] += p[4]
-                p[1] += p[5]
-                p[5] += 0.1
-                
-                self.canvas.create_oval(
-                    p[0] - p[3]/2, p[1] - p[3]/2,
-                    p[0] + p[3]/2, p[1] + p[3]/2,
-                    fill=p[2], outline="", tags="particle"
-                )
-            
-            self.root.after(16, lambda: animate_particles(step + 1))
-        
-        animate_particles()
+        self.particles.burst(CELEBRATION_PARTICLES, self.canvas.winfo_width(), self.canvas.winfo_height())
 
 def main():
     root = tk.Tk()
     app = TowerOfHanoi(root)
+    
+    # HANOI_PROFILE=out.prof profiles the animation hot paths for this session;
+    # inspect the result with python -m pstats out.prof.
+    profile_path = os.environ.get("HANOI_PROFILE")
+    if profile_path:
+        profiler = ProfilerHook(["tick", "draw", "apply_moves"])
+        app.perf.add_hook(profiler)
+    
     root.mainloop()
+    
+    if profile_path:
+        profiler.dump(profile_path)
 
 if __name__ == "__main__":
     main()
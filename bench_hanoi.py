@@ -0,0 +1,226 @@
+"""Benchmarks for the Tower of Hanoi solver and renderer.
+
+Solver benchmarks run anywhere. Renderer benchmarks need a Tk display; on a
+headless machine run them under a virtual display, e.g.
+
+    xvfb-run -s "-screen 0 1600x1000x24" python bench_hanoi.py --json bench.json
+
+Results are printed as a table and, with --json, written as machine-readable
+JSON so runs from different versions can be compared.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from hanoi_format import write_packed
+from hanoi_solver import hanoi_moves, hanoi_state_after, hanoi_total_moves
+
+def solve_recursive(n):
+    # The original list-building solver, kept as the baseline to compare against.
+    moves = []
+    
+    def recurse(n, source, target, auxiliary):
+        if n > 0:
+            recurse(n - 1, source, auxiliary, target)
+            moves.append((source, target))
+            recurse(n - 1, auxiliary, target, source)
+    
+    recurse(n, 0, 2, 1)
+    return len(moves)
+
+def solve_generator(n):
+    count = 0
+    for count, _ in enumerate(hanoi_moves(n), 1):
+        pass
+    return count
+
+def solve_board(n):
+    towers = hanoi_state_after(n, 0)
+    for source, target in hanoi_moves(n):
+        towers[target].append(towers[source].pop())
+    return hanoi_total_moves(n)
+
+def solve_packed(n):
+    return write_packed(io.BytesIO(), hanoi_moves(n), n)
+
+SOLVERS = {
+    "recursive": solve_recursive,
+    "generator": solve_generator,
+    "board": solve_board,
+    "packed": solve_packed,
+}
+
+def percentiles(samples):
+    samples = sorted(samples)
+    
+    def at(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+    
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": at(0.50) * 1000,
+        "p90_ms": at(0.90) * 1000,
+        "p99_ms": at(0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+def bench_solvers(disks, strategies, repeat):
+    results = []
+    for name in strategies:
+        solve = SOLVERS[name]
+        for n in disks:
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                moves = solve(n)
+                times.append(time.perf_counter() - started)
+            
+            # Memory is measured in a separate run because tracemalloc slows
+            # down allocation-heavy code and would skew the timings.
+            tracemalloc.start()
+            solve(n)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            best = min(times)
+            results.append({
+                "strategy": name,
+                "disks": n,
+                "moves": moves,
+                "best_s": best,
+                "median_s": statistics.median(times),
+                "moves_per_s": moves / best if best else None,
+                "peak_bytes": peak,
+            })
+    return results
+
+def bench_renderer(disk_counts, width, height, moves):
+    import tkinter as tk
+    from AI56 import TowerOfHanoi
+    
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        return {"skipped": f"no Tk display available ({error})"}
+    
+    root.geometry(f"{width}x{height}")
+    app = TowerOfHanoi(root)
+    root.update()
+    
+    results = {"canvas": [app.canvas.winfo_width(), app.canvas.winfo_height()], "runs": []}
+    try:
+        for n in disk_counts:
+            app.disk_count = n
+            app.reset()
+            root.update()
+            
+            build = []
+            for _ in range(20):
+                started = time.perf_counter()
+                app.renderer.invalidate()
+                app.draw_towers()
+                root.update_idletasks()
+                build.append(time.perf_counter() - started)
+            
+            background = []
+            for _ in range(5):
+                started = time.perf_counter()
+                app.renderer.render_background(app.renderer.width, app.renderer.height)
+                background.append(time.perf_counter() - started)
+            
+            disk = []
+            for _ in range(50):
+                started = time.perf_counter()
+                app.renderer.draw_3d_disk(-500, -500, 100, 20, n)
+                disk.append(time.perf_counter() - started)
+            app.canvas.delete(f"disk{n}")
+            app.renderer.disk_pos.pop(n, None)
+            app.renderer.invalidate()
+            app.draw_towers()
+            
+            # One animated frame: advance the disk in flight, draw, and let Tk
+            # repaint, which is what a clock tick costs at steady state.
+            frames = []
+            board = app.board
+            board.move_source = hanoi_moves(n)
+            for _ in range(min(moves, hanoi_total_moves(n))):
+                board.begin_move(time.perf_counter())
+                for frame in range(len(board.motion_path)):
+                    started = time.perf_counter()
+                    board.motion_frame = frame
+                    app.draw_towers()
+                    root.update_idletasks()
+                    frames.append(time.perf_counter() - started)
+                board.land_move()
+                app.draw_towers()
+            
+            results["runs"].append({
+                "disks": n,
+                "canvas_items": len(app.canvas.find_all()),
+                "scene_build": percentiles(build),
+                "background_render": percentiles(background),
+                "disk_draw": percentiles(disk),
+                "frame": percentiles(frames),
+            })
+    finally:
+        root.destroy()
+    return results
+
+def print_report(report):
+    print(f"Python {report['python']} on {report['platform']}")
+    print()
+    print(f"{'strategy':<10} {'disks':>5} {'moves':>10} {'best s':>9} {'moves/s':>12} {'peak KiB':>10}")
+    for row in report["solver"]:
+        print(f"{row['strategy']:<10} {row['disks']:>5} {row['moves']:>10} {row['best_s']:>9.4f} "
+              f"{row['moves_per_s'] or 0:>12,.0f} {row['peak_bytes'] / 1024:>10,.1f}")
+    
+    render = report.get("renderer")
+    if render is None:
+        return
+    print()
+    if "skipped" in render:
+        print(f"renderer: skipped, {render['skipped']}")
+        return
+    print(f"renderer on a {render['canvas'][0]}x{render['canvas'][1]} canvas (ms)")
+    print(f"{'disks':>5} {'items':>6} {'build p50':>10} {'frame p50':>10} {'frame p99':>10} {'frame max':>10}")
+    for run in render["runs"]:
+        print(f"{run['disks']:>5} {run['canvas_items']:>6} {run['scene_build']['p50_ms']:>10.2f} "
+              f"{run['frame']['p50_ms']:>10.3f} {run['frame']['p99_ms']:>10.3f} {run['frame']['max_ms']:>10.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Tower of Hanoi solver and renderer.")
+    parser.add_argument("--disks", type=int, nargs="+", default=[10, 14, 18, 20],
+                        help="disk counts for the solver benchmarks")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per solver case (best is reported)")
+    parser.add_argument("--render-disks", type=int, nargs="+", default=[3, 10, 30, 64],
+                        help="disk counts for the renderer benchmarks")
+    parser.add_argument("--render-moves", type=int, default=8, help="animated moves per renderer case")
+    parser.add_argument("--canvas", default="1200x700", help="window size for the renderer benchmarks")
+    parser.add_argument("--no-render", action="store_true", help="skip the renderer benchmarks")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args(argv)
+    
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "solver": bench_solvers(args.disks, args.strategies, args.repeat),
+    }
+    if not args.no_render:
+        width, height = (int(value) for value in args.canvas.split("x"))
+        report["renderer"] = bench_renderer(args.render_disks, width, height, args.render_moves)
+    
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump(report, stream, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
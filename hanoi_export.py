@@ -0,0 +1,300 @@
+"""Headless export of a Tower of Hanoi solution as images.
+
+Frames are drawn into plain RGB buffers with the same layout and colours as
+the Tk animation in AI56.py, so no display is needed. Every frame is built
+from plan.state_after() and plan.move_at(), which lets a process pool render
+frames in any order without replaying the moves before them.
+
+    python hanoi_export.py 5 -o frames
+    python hanoi_export.py 6 --pegs 4 --frames-per-move 12 --format ppm -o frames
+    python hanoi_export.py 4 --format gif -o hanoi.gif
+    python hanoi_export.py 10 --frames-per-move 2 --size 320x180 --format gif -o hanoi.gif
+
+PNG and PPM sequences need nothing beyond the standard library; GIF output
+uses Pillow when it is installed.
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import zlib
+from multiprocessing import Pool
+
+from hanoi_solver import add_plan_arguments, move_count, plan_from_arguments
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DISK_COLORS = ["#e74c3c", "#3498db", "#2ecc71", "#f39c12", "#9b59b6",
+               "#1abc9c", "#d35400", "#c0392b", "#16a085", "#8e44ad"]
+TOWER_COLOR = "#7f8c8d"
+BASE_COLOR = "#34495e"
+# Pillow holds every GIF frame until the file is written, so a GIF is limited
+# by the memory its RGB frames take. Image sequences are written as they are
+# rendered and only need confirming (--force) past SEQUENCE_FRAMES.
+GIF_MEMORY = 1 << 30
+SEQUENCE_FRAMES = 10000
+
+def rgb(color):
+    return bytes.fromhex(color[1:])
+
+def shade(color, amount):
+    return bytes(min(max(channel + amount, 0), 255) for channel in rgb(color))
+
+class Raster:
+    def __init__(self, width, height, pixels=None):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(pixels) if pixels is not None else bytearray(width * height * 3)
+        
+    def span(self, y, x0, x1, color):
+        # Fills pixels x0 <= x < x1 of row y; every shape below is a run of spans.
+        if not 0 <= y < self.height:
+            return
+        x0, x1 = max(0, x0), min(self.width, x1)
+        if x0 < x1:
+            at = (y * self.width + x0) * 3
+            self.pixels[at:at + (x1 - x0) * 3] = color * (x1 - x0)
+        
+    def rectangle(self, x0, y0, x1, y1, color):
+        for y in range(max(0, round(y0)), min(self.height, round(y1))):
+            self.span(y, round(x0), round(x1), color)
+        
+    def oval(self, x0, y0, x1, y1, color):
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+        if rx <= 0 or ry <= 0:
+            return
+        for y in range(max(0, math.floor(y0)), min(self.height, math.ceil(y1))):
+            dy = (y + 0.5 - cy) / ry
+            if abs(dy) < 1:
+                half = rx * math.sqrt(1 - dy * dy)
+                self.span(y, round(cx - half), round(cx + half), color)
+        
+    def polygon(self, points, color):
+        # Scanline fill for the convex shapes the scene uses.
+        edges = list(zip(points, points[1:] + points[:1]))
+        top = min(y for _, y in points)
+        bottom = max(y for _, y in points)
+        for y in range(max(0, math.floor(top)), min(self.height, math.ceil(bottom))):
+            center = y + 0.5
+            xs = [ax + (center - ay) * (bx - ax) / (by - ay)
+                  for (ax, ay), (bx, by) in edges
+                  if ay != by and min(ay, by) <= center < max(ay, by)]
+            if xs:
+                self.span(y, round(min(xs)), round(max(xs)), color)
+
+class FrameRenderer:
+    # Uses the geometry of HanoiRenderer.layout() so exported frames match the
+    # live animation. Frame i shows move start + i // frames_per_move at
+    # phase i % frames_per_move along its arc; the last frame is the position
+    # after the final move.
+    def __init__(self, plan, width, height, frames_per_move=8, start=0, count=None):
+        self.plan = plan
+        self.width = width
+        self.height = height
+        self.frames_per_move = frames_per_move
+        self.start = start
+        self.end = plan.total if count is None else min(plan.total, start + count)
+        self.frame_count = (self.end - start) * frames_per_move + 1
+        
+        self.tower_width = 20
+        self.tower_height = height * 0.7
+        self.tower_spacing = width / (plan.pegs + 1)
+        self.tower_bottom = height * 0.8
+        self.tower_top = self.tower_bottom - self.tower_height
+        self.base_height = 30
+        self.max_disk_width = self.tower_spacing * 0.8
+        self.disk_height = min(30, self.tower_height / (plan.disks + 2))
+        
+        self.disk_shades = [(rgb(color), shade(color, 30), shade(color, -30)) for color in DISK_COLORS]
+        self.scenery = self.render_scenery()
+        
+    def tower_x(self, peg):
+        return self.tower_spacing * (peg + 1)
+        
+    def slot(self, peg, index):
+        return self.tower_x(peg), self.tower_bottom - (index + 1) * self.disk_height
+        
+    def render_scenery(self):
+        # Background, base and towers never change, so they are drawn once and
+        # copied into every frame.
+        raster = Raster(self.width, self.height)
+        for y in range(self.height):
+            color = bytes((int(30 + (y / self.height) * 10), int(39 + (y / self.height) * 15), int(46 + (y / self.height) * 20)))
+            raster.span(y, 0, self.width, color)
+        
+        x, y = self.tower_spacing - self.tower_spacing * self.plan.pegs / 2, self.tower_bottom
+        width, height = self.tower_spacing * self.plan.pegs, self.base_height
+        raster.rectangle(x, y, x + width, y + height, rgb(BASE_COLOR))
+        raster.polygon([(x, y), (x + width, y), (x + width - 10, y + 5), (x + 10, y + 5)], rgb("#3c5979"))
+        raster.polygon([(x + width, y), (x + width, y + height), (x + width - 10, y + height - 5), (x + width - 10, y + 5)],
+                       rgb("#2c3e50"))
+        for line_x in range(int(x) + 20, int(x + width), 40):
+            raster.rectangle(line_x - 1, y + 5, line_x + 1, y + height - 5, rgb("#2c3e50"))
+        
+        half = self.tower_width / 2
+        for peg in range(self.plan.pegs):
+            x = self.tower_x(peg)
+            raster.rectangle(x - half, self.tower_top, x + half, self.tower_bottom, rgb(TOWER_COLOR))
+            raster.rectangle(x - half, self.tower_top, x - half + 3, self.tower_bottom, rgb("#95a5a6"))
+            raster.rectangle(x + half - 3, self.tower_top, x + half, self.tower_bottom, rgb("#5d6d7e"))
+            raster.oval(x - half - 5, self.tower_top - 10, x + half + 5, self.tower_top + 10, rgb("#95a5a6"))
+        return bytes(raster.pixels)
+        
+    def draw_disk(self, raster, x, y, disk):
+        width = self.max_disk_width * (disk / self.plan.disks)
+        height = self.disk_height
+        base, highlight, shadow = self.disk_shades[disk % len(self.disk_shades)]
+        
+        raster.rectangle(x - width/2, y, x + width/2, y + height, base)
+        raster.rectangle(x - width/2, y, x + width/2, y + height/4, highlight)
+        raster.rectangle(x - width/2, y + 3*height/4, x + width/2, y + height, shadow)
+        raster.oval(x - width/2 - height/4, y, x - width/2 + height/4, y + height, highlight)
+        raster.oval(x + width/2 - height/4, y, x + width/2 + height/4, y + height, shadow)
+        
+    def render(self, index):
+        move, phase = divmod(index, self.frames_per_move)
+        move += self.start
+        if move >= self.end:
+            move, phase = self.end, 0
+        
+        towers = self.plan.state_after(move)
+        flying = None
+        if phase:
+            # The same quadratic Bezier arc as calculate_motion_path().
+            source, target = self.plan.move_at(move + 1)
+            disk = towers[source].pop()
+            source_x, source_y = self.slot(source, len(towers[source]))
+            target_x, target_y = self.slot(target, len(towers[target]))
+            control_y = min(source_y, target_y) - 100
+            t = phase / self.frames_per_move
+            flying = (
+                disk,
+                (1-t)**2 * source_x + 2*(1-t)*t * ((source_x + target_x)/2) + t**2 * target_x,
+                (1-t)**2 * source_y + 2*(1-t)*t * control_y + t**2 * target_y,
+            )
+        
+        raster = Raster(self.width, self.height, self.scenery)
+        for peg, tower in enumerate(towers):
+            for j, disk in enumerate(tower):
+                self.draw_disk(raster, *self.slot(peg, j), disk)
+        if flying is not None:
+            disk, x, y = flying
+            self.draw_disk(raster, x, y, disk)
+        return bytes(raster.pixels)
+
+def png_bytes(width, height, pixels):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    
+    stride = width * 3
+    rows = b"".join(b"\0" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 6))
+            + chunk(b"IEND", b""))
+
+def ppm_bytes(width, height, pixels):
+    return b"P6 %d %d 255\n" % (width, height) + pixels
+
+ENCODERS = {"png": png_bytes, "ppm": ppm_bytes}
+
+# Each pool worker builds its own FrameRenderer once; after that a task is
+# just a frame index.
+_worker = None
+
+def _start_worker(*args):
+    global _worker
+    _worker = FrameRenderer(*args)
+
+def _render_frame(index):
+    return _worker.render(index)
+
+def _write_frame(task):
+    index, path, format = task
+    with open(path, "wb") as stream:
+        stream.write(ENCODERS[format](_worker.width, _worker.height, _worker.render(index)))
+    return index
+
+def export_frames(plan, output, format="png", width=800, height=450, frames_per_move=8,
+                  start=0, count=None, jobs=None, frame_ms=40, max_frames=SEQUENCE_FRAMES):
+    # Writes output/frame_00000.png, ... (or .ppm), or a single animated GIF
+    # at output. Returns the number of frames. Sequences longer than
+    # max_frames (None for no limit) are refused.
+    if format == "gif" and Image is None:
+        raise ValueError("GIF export needs Pillow (pip install pillow); use --format png instead")
+    if format not in ENCODERS and format != "gif":
+        raise ValueError(f"unknown image format {format!r}")
+    
+    renderer_args = (plan, width, height, frames_per_move, start, count)
+    frame_count = FrameRenderer(*renderer_args).frame_count
+    if format == "gif" and frame_count * width * height * 3 > GIF_MEMORY:
+        raise ValueError(f"a GIF of {frame_count} frames at {width}x{height} needs more than "
+                         f"{GIF_MEMORY >> 20} MiB; lower --limit, --frames-per-move or --size, or use --format png")
+    if format != "gif" and max_frames is not None and frame_count > max_frames:
+        raise ValueError(f"this would write {frame_count} frames; lower --limit or --frames-per-move, "
+                         f"or pass --force to write more than {max_frames}")
+    chunk = max(1, min(64, frame_count // ((jobs or os.cpu_count() or 1) * 4)))
+    
+    with Pool(jobs, initializer=_start_worker, initargs=renderer_args) as pool:
+        if format == "gif":
+            frames = [Image.frombytes("RGB", (width, height), pixels)
+                      for pixels in pool.imap(_render_frame, range(frame_count), chunk)]
+            frames[0].save(output, save_all=True, append_images=frames[1:], duration=frame_ms, loop=0)
+        else:
+            os.makedirs(output, exist_ok=True)
+            digits = max(5, len(str(frame_count - 1)))
+            tasks = ((index, os.path.join(output, f"frame_{index:0{digits}d}.{format}"), format)
+                     for index in range(frame_count))
+            for _ in pool.imap_unordered(_write_frame, tasks, chunk):
+                pass
+    return frame_count
+
+def size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"size must look like 800x450, got {value!r}")
+    if width < 50 or height < 50:
+        raise argparse.ArgumentTypeError("frames must be at least 50x50")
+    return width, height
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a Tower of Hanoi solution to images without a display.")
+    add_plan_arguments(parser)
+    parser.add_argument("-o", "--output", required=True, help="directory for image sequences, file for GIF")
+    parser.add_argument("--format", choices=["png", "ppm", "gif"], default="png")
+    parser.add_argument("--size", type=size, default=(800, 450), help="frame size as WIDTHxHEIGHT")
+    parser.add_argument("--frames-per-move", type=int, default=8)
+    parser.add_argument("--start", type=move_count, default=0, help="skip this many moves first")
+    parser.add_argument("--limit", type=move_count, help="render at most this many moves")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--frame-ms", type=int, default=40, help="GIF frame duration")
+    parser.add_argument("--force", action="store_true",
+                        help=f"write PNG/PPM sequences longer than {SEQUENCE_FRAMES} frames")
+    args = parser.parse_args(argv)
+    
+    try:
+        plan = plan_from_arguments(args)
+        if not 0 <= args.start <= plan.total:
+            raise ValueError(f"--start must be between 0 and {plan.total}")
+        if args.frames_per_move < 1:
+            raise ValueError("--frames-per-move must be at least 1")
+        
+        width, height = args.size
+        count = export_frames(plan, args.output, args.format, width, height, args.frames_per_move,
+                              args.start, args.limit, args.jobs, args.frame_ms,
+                              None if args.force else SEQUENCE_FRAMES)
+    except ValueError as error:
+        print(f"hanoi_export: error: {error}", file=sys.stderr)
+        return 2
+    
+    print(f"wrote {count} frames to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
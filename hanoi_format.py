@@ -0,0 +1,212 @@
+"""Packed on-disk format for Tower of Hanoi move streams.
+
+A file is a fixed header followed by the moves packed LSB-first at a fixed
+number of bits per move (3 bits for three pegs):
+
+    magic "HNOI" | version u8 | disks u16 | pegs u8 | bits u8 | moves u64 | start size u16
+    start: moves of the solution before the first one here, start size bytes LE
+    start state: one byte per disk (peg of disk 1, disk 2, ...) after those moves
+    packed moves, plus one zero byte so any move can be read as two bytes
+"""
+import mmap
+import struct
+from itertools import islice
+
+MAGIC = b"HNOI"
+VERSION = 2
+HEADER = struct.Struct("<4sBHBBQH")
+CHUNK_MOVES = 65536
+MAX_MOVES = (1 << 64) - 1
+
+def move_bits(pegs):
+    return max(1, (pegs * (pegs - 1) - 1).bit_length())
+
+def move_codes(pegs):
+    pairs = [(a, b) for a in range(pegs) for b in range(pegs) if a != b]
+    return {pair: code for code, pair in enumerate(pairs)}, pairs
+
+def packed_chunks(moves, pegs, chunk_moves=CHUNK_MOVES):
+    # Yields (moves, bytes) for consecutive chunks of the move stream. Chunks
+    # are a multiple of 8 moves, so each one starts on a byte boundary.
+    if chunk_moves % 8:
+        raise ValueError("chunks must hold a multiple of 8 moves")
+    
+    bits = move_bits(pegs)
+    encode, _ = move_codes(pegs)
+    digits = {code: format(code, f"0{bits}b") for code in encode.values()}
+    to_bits = {pair: digits[code] for pair, code in encode.items()}
+    
+    moves = iter(moves)
+    while True:
+        chunk = list(islice(moves, chunk_moves))
+        if not chunk:
+            break
+        
+        # Building the chunk as one binary string and converting it with int()
+        # keeps the per-move work to a dict lookup.
+        padding = -len(chunk) % 8
+        try:
+            binary = "".join([to_bits[move] for move in reversed(chunk)])
+        except KeyError as error:
+            raise ValueError(f"invalid move {error.args[0]} for {pegs} pegs")
+        yield len(chunk), int(binary, 2).to_bytes((len(chunk) + padding) * bits // 8, "little")
+
+def packed_header(disks, pegs, count, start_state, start=0):
+    if not 0 <= count <= MAX_MOVES:
+        raise ValueError(f"the packed format holds at most {MAX_MOVES} moves")
+    if not 1 <= disks <= 0xFFFF:
+        raise ValueError("the packed format holds between 1 and 65535 disks")
+    # Solutions run past 2**64 moves, so the start index is stored at its
+    # own length rather than in a fixed field.
+    if start < 0:
+        raise ValueError("the start index must not be negative")
+    index = start.to_bytes((start.bit_length() + 7) // 8, "little")
+    return HEADER.pack(MAGIC, VERSION, disks, pegs, move_bits(pegs), count, len(index)) + index + bytes(start_state)
+
+def write_packed(stream, moves, disks, pegs=3, start_state=None, count=None, start=0):
+    # The move count lives in the header, so it is patched in afterwards when
+    # the stream is seekable and must be given up front when it is not.
+    if start_state is None:
+        start_state = [0] * disks
+    if len(start_state) != disks:
+        raise ValueError("start state must give one peg per disk")
+    if count is None and not stream.seekable():
+        raise ValueError("writing to an unseekable stream needs the move count up front")
+    
+    header_at = stream.tell() if stream.seekable() else 0
+    stream.write(packed_header(disks, pegs, count or 0, start_state, start))
+    
+    written = 0
+    for size, data in packed_chunks(moves, pegs):
+        written += size
+        stream.write(data)
+    
+    stream.write(b"\0")
+    
+    if count is None:
+        end = stream.tell()
+        stream.seek(header_at)
+        stream.write(packed_header(disks, pegs, written, start_state, start)[:HEADER.size])
+        stream.seek(end)
+    elif count != written:
+        raise ValueError(f"expected {count} moves, got {written}")
+    return written
+
+def save_packed(path, moves, disks, pegs=3, start_state=None):
+    with open(path, "wb") as stream:
+        return write_packed(stream, moves, disks, pegs, start_state)
+
+def is_packed(path):
+    with open(path, "rb") as stream:
+        return stream.read(len(MAGIC)) == MAGIC
+
+class PackedMoves:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        if len(buffer) < HEADER.size:
+            raise ValueError("packed move file is truncated")
+        magic, version, self.disks, self.pegs, self.bits, self.count, start_size = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a packed Hanoi move file")
+        if version != VERSION:
+            raise ValueError(f"unsupported packed format version {version}")
+        
+        state_at = HEADER.size + start_size
+        self.start = int.from_bytes(buffer[HEADER.size:state_at], "little")
+        self.start_state = list(buffer[state_at:state_at + self.disks])
+        self.data_offset = state_at + self.disks
+        self.mask = (1 << self.bits) - 1
+        _, self.pairs = move_codes(self.pegs)
+        
+        if len(buffer) < self.data_offset + (self.count * self.bits + 7) // 8 + 1:
+            raise ValueError("packed move file is truncated")
+        
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as stream:
+            return cls(mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ))
+        
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.close()
+        
+    def __len__(self):
+        return self.count
+        
+    def code_at(self, index):
+        offset = index * self.bits
+        at = self.data_offset + (offset >> 3)
+        return (int.from_bytes(self.buffer[at:at + 2], "little") >> (offset & 7)) & self.mask
+        
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("move index out of range")
+        return self.pairs[self.code_at(index)]
+        
+    def __iter__(self):
+        return self.iter_from(0)
+        
+    def iter_from(self, start):
+        # Moves are decoded a byte-aligned group at a time: 8 moves share 3
+        # bytes at 3 bits per move, so each group is one small int.
+        bits, mask, pairs = self.bits, self.mask, self.pairs
+        group = 8
+        while group * bits % 8:
+            group //= 2
+        group_bytes = group * bits // 8
+        shifts = range(0, group * bits, bits)
+        
+        index = start
+        while index < self.count and index % group:
+            yield self[index]
+            index += 1
+        
+        buffer = self.buffer
+        at = self.data_offset + index * bits // 8
+        full_groups = max(0, self.count - index) // group
+        for _ in range(full_groups):
+            value = int.from_bytes(buffer[at:at + group_bytes], "little")
+            at += group_bytes
+            for shift in shifts:
+                yield pairs[value >> shift & mask]
+        index += full_groups * group
+        
+        while index < self.count:
+            yield self[index]
+            index += 1
+        
+    def data(self):
+        return memoryview(self.buffer)[self.data_offset:self.data_offset + (self.count * self.bits + 7) // 8]
+
+def first_difference(a, b, block=1 << 20):
+    # Compares the packed bytes a block at a time and only decodes moves inside
+    # the first block that differs. Returns None when both streams are equal.
+    if (a.pegs, a.bits) != (b.pegs, b.bits):
+        raise ValueError("move streams use different peg counts")
+    
+    data_a, data_b = a.data(), b.data()
+    common = min(a.count, b.count)
+    common_bytes = common * a.bits // 8
+    
+    at = 0
+    while block and at < common_bytes:
+        end = min(at + block, common_bytes)
+        if data_a[at:end] != data_b[at:end]:
+            block //= 64
+        else:
+            at = end
+    index = at * 8 // a.bits
+    
+    while index < common:
+        if a.code_at(index) != b.code_at(index):
+            return index
+        index += 1
+    return None if a.count == b.count else common
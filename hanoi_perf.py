@@ -0,0 +1,179 @@
+"""Frame timing, counters and profiler hooks for the Tower of Hanoi animation.
+
+PerfMonitor only records numbers, so it can be used without a display.
+PerfHud draws a summary on any Tk canvas, and export_trace() writes the
+recorded events in the Chrome trace format (chrome://tracing, Perfetto).
+"""
+import cProfile
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class PerfMonitor:
+    def __init__(self, history=240, trace_limit=200000):
+        self.origin = time.perf_counter()
+        self.frame_times = deque(maxlen=history)
+        self.frame_lags = deque(maxlen=history)
+        self.move_samples = deque(maxlen=history)
+        self.frames = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self.moves = 0
+        self.gauges = {}
+        self.trace = deque(maxlen=trace_limit)
+        self.hooks = []
+        
+    def add_hook(self, hook):
+        # Hooks are called as hook(name, "begin") and hook(name, "end") around
+        # every section, which is where a profiler can be switched on and off.
+        self.hooks.append(hook)
+        
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+        
+    @contextmanager
+    def section(self, name):
+        for hook in self.hooks:
+            hook(name, "begin")
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.trace.append(("X", name, started, ended - started))
+            for hook in self.hooks:
+                hook(name, "end")
+        
+    def frame(self, started, duration, lag, budget):
+        self.frames += 1
+        self.frame_times.append(duration)
+        self.frame_lags.append(lag)
+        if lag > budget or duration > budget:
+            self.late_frames += 1
+        self.trace.append(("X", "frame", started, duration))
+        
+    def dropped(self, count):
+        self.dropped_frames += count
+        self.trace.append(("C", "dropped_frames", time.perf_counter(), self.dropped_frames))
+        
+    def count_moves(self, count):
+        self.moves += count
+        
+    def gauge(self, name, value):
+        self.gauges[name] = value
+        self.trace.append(("C", name, time.perf_counter(), value))
+        
+    def sample_moves(self):
+        now = time.perf_counter()
+        self.move_samples.append((now, self.moves))
+        self.trace.append(("C", "moves", now, self.moves))
+        
+    def moves_per_second(self):
+        if len(self.move_samples) < 2:
+            return 0.0
+        (first_time, first_moves), (last_time, last_moves) = self.move_samples[0], self.move_samples[-1]
+        if last_time <= first_time:
+            return 0.0
+        return (last_moves - first_moves) / (last_time - first_time)
+        
+    def summary(self):
+        times = sorted(self.frame_times)
+        lags = sorted(self.frame_lags)
+        
+        def at(samples, fraction):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000
+        
+        summary = {
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "dropped_frames": self.dropped_frames,
+            "frame_p50_ms": at(times, 0.5),
+            "frame_p99_ms": at(times, 0.99),
+            "lag_p50_ms": at(lags, 0.5),
+            "lag_max_ms": at(lags, 1.0),
+            "moves_per_s": self.moves_per_second(),
+        }
+        summary.update(self.gauges)
+        return summary
+        
+    def export_trace(self, path):
+        events = []
+        for kind, name, at, value in self.trace:
+            event = {"name": name, "ph": kind, "ts": (at - self.origin) * 1e6, "pid": 1, "tid": 1}
+            if kind == "X":
+                event["dur"] = value * 1e6
+            else:
+                event["args"] = {name: value}
+            events.append(event)
+        
+        with open(path, "w") as stream:
+            json.dump({"traceEvents": events, "otherData": self.summary()}, stream)
+        return len(events)
+
+class ProfilerHook:
+    # cProfile that only runs inside the named sections (all sections when none
+    # are given), e.g. monitor.add_hook(ProfilerHook(["draw", "apply_moves"])).
+    def __init__(self, sections=None):
+        self.profile = cProfile.Profile()
+        self.sections = set(sections) if sections else None
+        self.depth = 0
+        
+    def __call__(self, name, phase):
+        if self.sections is not None and name not in self.sections:
+            return
+        
+        if phase == "begin":
+            if self.depth == 0:
+                self.profile.enable()
+            self.depth += 1
+        else:
+            self.depth -= 1
+            if self.depth == 0:
+                self.profile.disable()
+        
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+class PerfHud:
+    def __init__(self, canvas, monitor):
+        self.canvas = canvas
+        self.monitor = monitor
+        self.visible = False
+        self.item = None
+        
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.update()
+        elif self.item is not None:
+            self.canvas.delete(self.item)
+            self.item = None
+        
+    def update(self):
+        if not self.visible:
+            return
+        
+        stats = self.monitor.summary()
+        lines = [
+            f"frame  p50 {stats['frame_p50_ms']:.2f} ms  p99 {stats['frame_p99_ms']:.2f} ms",
+            f"lag    p50 {stats['lag_p50_ms']:.2f} ms  max {stats['lag_max_ms']:.2f} ms",
+            f"late {stats['late_frames']}  dropped {stats['dropped_frames']}",
+            f"moves/s {stats['moves_per_s']:,.0f}",
+        ]
+        for name, value in self.monitor.gauges.items():
+            lines.append(f"{name.replace('_', ' ')} {value}")
+        text = "\n".join(lines)
+        
+        # The scene is rebuilt with delete("all") on resize, which takes the
+        # HUD item with it, so it is recreated whenever it has gone missing.
+        if self.item is None or not self.canvas.find_withtag(self.item):
+            self.item = self.canvas.create_text(
+                10, 10, text=text, anchor="nw", fill="#2ecc71",
+                font=("Courier", 10, "bold"), tags=("hud",)
+            )
+        else:
+            self.canvas.itemconfig(self.item, text=text)
+        self.canvas.tag_raise(self.item)
@@ -0,0 +1,140 @@
+"""Local move-streaming server for the Tower of Hanoi solver.
+
+A client connects and sends one JSON line, for example
+
+    {"disks": 20, "pegs": 3, "variant": "classic", "start": 0, "limit": 1000000}
+
+(only "disks" is required). The reply is the packed format from
+hanoi_format.py: the header with the move count and the position at "start",
+the moves, and the closing zero byte, after which the connection is closed.
+A request that cannot be served gets one "ERROR <reason>" line instead, so
+clients can tell the two apart by the first four bytes.
+
+Moves are generated lazily and sent a chunk at a time, waiting for each chunk
+to drain, so a slow client only holds back its own stream and no solution is
+ever held in memory.
+
+    python hanoi_server.py --port 8765
+    python hanoi_server.py --unix /tmp/hanoi.sock
+"""
+import argparse
+import asyncio
+import json
+import sys
+from itertools import islice
+
+from hanoi_format import MAX_MOVES, packed_chunks, packed_header
+from hanoi_solver import MAX_DISKS, VARIANTS, make_plan, pegs_from_towers
+
+STREAM_CHUNK_MOVES = 8192
+WRITE_BUFFER = 256 * 1024
+REQUEST_TIMEOUT = 10.0
+REQUEST_LIMIT = 4096
+
+def plan_request(line):
+    # Returns (plan, start, count) for one request line.
+    try:
+        request = json.loads(line)
+    except ValueError:
+        raise ValueError("request must be one line of JSON")
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    
+    disks = request.get("disks")
+    pegs = request.get("pegs", 3)
+    variant = request.get("variant", "classic")
+    start = request.get("start", 0)
+    limit = request.get("limit")
+    
+    for name, value in (("disks", disks), ("pegs", pegs), ("start", start), ("limit", limit)):
+        if value is None and name == "limit":
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{name} must be a non-negative integer")
+    if not 1 <= disks <= MAX_DISKS:
+        raise ValueError(f"disks must be between 1 and {MAX_DISKS}")
+    if variant not in VARIANTS:
+        raise ValueError(f"variant must be one of {', '.join(VARIANTS)}")
+    
+    plan = make_plan(disks, pegs, variant=variant)
+    if start > plan.total:
+        raise ValueError(f"start must be between 0 and {plan.total}")
+    count = plan.total - start
+    if limit is not None:
+        count = min(count, limit)
+    if count > MAX_MOVES:
+        raise ValueError(f"a stream holds at most {MAX_MOVES} moves; give a smaller limit")
+    return plan, start, count
+
+async def stream_moves(writer, plan, start, count):
+    writer.write(packed_header(plan.disks, plan.pegs, count, pegs_from_towers(plan.state_after(start)), start))
+    
+    moves = islice(plan.moves(start=start), count)
+    for _, data in packed_chunks(moves, plan.pegs, STREAM_CHUNK_MOVES):
+        writer.write(data)
+        # drain() only blocks once the client falls WRITE_BUFFER behind; the
+        # sleep hands the loop to other clients between chunks either way.
+        await writer.drain()
+        await asyncio.sleep(0)
+    
+    writer.write(b"\0")
+    await writer.drain()
+
+async def read_request(reader):
+    try:
+        line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+    except ValueError:
+        # readline() gives up with ValueError when no newline arrives within
+        # the stream's limit.
+        raise ValueError(f"request is longer than {REQUEST_LIMIT} bytes")
+    return plan_request(line)
+
+async def handle_client(reader, writer):
+    writer.transport.set_write_buffer_limits(WRITE_BUFFER)
+    try:
+        try:
+            plan, start, count = await read_request(reader)
+        except ValueError as error:
+            writer.write(f"ERROR {error}\n".encode())
+            await writer.drain()
+            return
+        await stream_moves(writer, plan, start, count)
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(host="127.0.0.1", port=8765, unix=None, ready=None):
+    if unix:
+        server = await asyncio.start_unix_server(handle_client, unix, limit=REQUEST_LIMIT)
+    else:
+        server = await asyncio.start_server(handle_client, host, port, limit=REQUEST_LIMIT)
+    
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream Tower of Hanoi solutions to local clients.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+    
+    def ready(server):
+        where = args.unix or ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"serving Hanoi moves on {where}", flush=True)
+    
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1072 @@
+"""Headless Tower of Hanoi solver.
+
+Everything here is plain Python so it can run on machines without a
+display; AI56.py builds the Tk animation on top of it.
+
+    python hanoi_solver.py count 20
+    python hanoi_solver.py solve 20 -o moves.txt
+    python hanoi_solver.py verify 20 moves.txt
+    python hanoi_solver.py count 40 --pegs 4
+    python hanoi_solver.py solve 5 --from 01210 --to 22100
+    python hanoi_solver.py count 20 --variant cyclic
+    python hanoi_solver.py solve 30 --format packed -o moves.hnoi
+    python hanoi_solver.py verify 30 moves.hnoi
+    python hanoi_solver.py diff a.hnoi b.hnoi
+"""
+import argparse
+import sys
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from math import comb
+
+from hanoi_format import PackedMoves, first_difference, is_packed, move_bits, move_codes, write_packed
+
+MAX_DISKS = 2048
+MAX_PEGS = 16
+TABLE_STATES = 1 << 18
+SEARCH_LIMIT = 2000000
+UNREACHED = 0xFFFFFFFF
+CHECK_CHUNK = 1 << 16
+CHECK_GROUP = 64
+CHECK_CACHE = 1 << 16
+CHECK_MISSES = 64
+INVALID_CODE = 255
+VARIANTS = ("classic", "adjacent", "cyclic")
+ZIGZAG = (0, 1, 2, 1)
+
+def hanoi_total_moves(n):
+    return 2 ** n - 1
+
+def hanoi_peg_order(n, source, target, auxiliary):
+    if n % 2:
+        return (source, auxiliary, target)
+    return (source, target, auxiliary)
+
+def hanoi_moves(n, source=0, target=2, auxiliary=1, start=0):
+    # Move k of the optimal solution is decoded from the bits of k alone, so the
+    # generator keeps no history and costs the same for every move.
+    pegs = hanoi_peg_order(n, source, target, auxiliary)
+    
+    for k in range(start + 1, 2 ** n):
+        yield pegs[(k & (k - 1)) % 3], pegs[((k | (k - 1)) + 1) % 3]
+
+def hanoi_move_at(n, k, source=0, target=2, auxiliary=1):
+    if not 1 <= k < 2 ** n:
+        raise ValueError(f"move index must be between 1 and {2 ** n - 1}")
+    
+    pegs = hanoi_peg_order(n, source, target, auxiliary)
+    return pegs[(k & (k - 1)) % 3], pegs[((k | (k - 1)) + 1) % 3]
+
+def hanoi_state_after(n, k, source=0, target=2, auxiliary=1):
+    # Bit d-1 of k tells whether disk d has already made its single move of the
+    # current sub-problem, which fixes its peg and the pegs of the smaller disks.
+    if not 0 <= k < 2 ** n:
+        raise ValueError(f"move index must be between 0 and {2 ** n - 1}")
+    
+    towers = [[], [], []]
+    for disk in range(n, 0, -1):
+        if k >> (disk - 1) & 1:
+            towers[target].append(disk)
+            source, auxiliary = auxiliary, source
+        else:
+            towers[source].append(disk)
+            target, auxiliary = auxiliary, target
+    return towers
+
+def adjacent_total_moves(n):
+    return 3 ** n - 1
+
+def adjacent_moves(n, source=0, target=2, middle=1, start=0):
+    # Moves may only go between neighbouring pegs. The optimal solution walks
+    # every position once (a ternary Gray code): move k moves disk 1 + (the
+    # number of trailing zeros of k in base 3), and every disk zigzags
+    # source, middle, target, middle, source, ... A base-3 counter and one
+    # zigzag phase per disk are all the state needed.
+    pegs = (source, middle, target)
+    digits = []
+    phase = []
+    k = start
+    for _ in range(n):
+        k, digit = divmod(k, 3)
+        digits.append(digit)
+    
+    moves_before = start
+    for _ in range(n):
+        following = moves_before // 3
+        phase.append((moves_before - following) % 4)
+        moves_before = following
+    
+    for _ in range(start + 1, 3 ** n):
+        disk = 0
+        while digits[disk] == 2:
+            digits[disk] = 0
+            disk += 1
+        digits[disk] += 1
+        
+        at = phase[disk]
+        phase[disk] = (at + 1) % 4
+        yield pegs[ZIGZAG[at]], pegs[ZIGZAG[(at + 1) % 4]]
+
+def adjacent_state_after(n, k, source=0, target=2, middle=1):
+    # Disk d has moved k // 3**(d-1) - k // 3**d times after k moves, which
+    # fixes where it is on its zigzag.
+    if not 0 <= k < 3 ** n:
+        raise ValueError(f"move index must be between 0 and {3 ** n - 1}")
+    
+    pegs = (source, middle, target)
+    peg_of = []
+    for _ in range(n):
+        following = k // 3
+        peg_of.append(pegs[ZIGZAG[(k - following) % 4]])
+        k = following
+    return towers_from_pegs(peg_of, 3)
+
+def adjacent_move_at(n, k, source=0, target=2, middle=1):
+    if not 1 <= k < 3 ** n:
+        raise ValueError(f"move index must be between 1 and {3 ** n - 1}")
+    
+    disk = 0
+    while k % 3 ** (disk + 1) == 0:
+        disk += 1
+    moves_before = (k - 1) // 3 ** disk - (k - 1) // 3 ** (disk + 1)
+    pegs = (source, middle, target)
+    return pegs[ZIGZAG[moves_before % 4]], pegs[ZIGZAG[(moves_before + 1) % 4]]
+
+@lru_cache(maxsize=None)
+def cyclic_lengths(n):
+    # Moves pegs only one way round (0 -> 1 -> 2 -> 0). Q(n) moves a tower one
+    # step round, R(n) two steps; R(n) + 1 = p + 2q where (1 + sqrt 3)**n is
+    # p + q sqrt 3, which gives both counts exactly from O(log n) products.
+    def power(n):
+        if n == 0:
+            return 1, 0
+        p, q = power(n // 2)
+        p, q = p * p + 3 * q * q, 2 * p * q
+        if n % 2:
+            p, q = p + 3 * q, p + q
+        return p, q
+    
+    if n == 0:
+        return 0, 0
+    p, q = power(n - 1)
+    below = p + 2 * q
+    p, q = p + 3 * q, p + q
+    return 2 * below - 1, p + 2 * q - 1
+
+def cyclic_total_moves(n):
+    return cyclic_lengths(n)[1]
+
+def cyclic_moves(n, source=0, start=0):
+    # Tasks are (disks, from peg, steps round, moves to skip) on an explicit
+    # stack. A one-disk, one-step task is a single move.
+    stack = [(n, source, 2, start)]
+    while stack:
+        n, a, steps, skip = stack.pop()
+        if n == 0 or skip >= cyclic_lengths(n)[steps - 1]:
+            continue
+        if n == 1 and steps == 1:
+            yield a, (a + 1) % 3
+            continue
+        
+        b, c = (a + 1) % 3, (a + 2) % 3
+        q, r = cyclic_lengths(n - 1)
+        if steps == 1:
+            stack.append((n - 1, c, 2, max(0, skip - r - 1)))
+            stack.append((1, a, 1, max(0, skip - r)))
+            stack.append((n - 1, a, 2, skip))
+        else:
+            stack.append((n - 1, a, 2, max(0, skip - r - q - 2)))
+            stack.append((1, b, 1, max(0, skip - r - q - 1)))
+            stack.append((n - 1, c, 1, max(0, skip - r - 1)))
+            stack.append((1, a, 1, max(0, skip - r)))
+            stack.append((n - 1, a, 2, skip))
+
+def cyclic_state_after(n, k, source=0):
+    if not 0 <= k <= cyclic_total_moves(n):
+        raise ValueError(f"move index must be between 0 and {cyclic_total_moves(n)}")
+    
+    peg_of = [0] * n
+    a, steps = source, 2
+    for disk in range(n, 0, -1):
+        q, r = cyclic_lengths(disk - 1)
+        if steps == 1:
+            if k <= r:
+                peg_of[disk - 1], a = a, a
+            else:
+                peg_of[disk - 1], a, k = (a + 1) % 3, (a + 2) % 3, k - r - 1
+            steps = 2
+        elif k <= r:
+            peg_of[disk - 1] = a
+        elif k <= r + 1 + q:
+            peg_of[disk - 1], a, steps, k = (a + 1) % 3, (a + 2) % 3, 1, k - r - 1
+        else:
+            peg_of[disk - 1], k = (a + 2) % 3, k - r - q - 2
+    return towers_from_pegs(peg_of, 3)
+
+def cyclic_move_at(n, k, source=0):
+    if not 1 <= k <= cyclic_total_moves(n):
+        raise ValueError(f"move index must be between 1 and {cyclic_total_moves(n)}")
+    
+    before = pegs_from_towers(cyclic_state_after(n, k - 1, source))
+    after = pegs_from_towers(cyclic_state_after(n, k, source))
+    disk = next(disk for disk in range(n) if before[disk] != after[disk])
+    return before[disk], after[disk]
+
+def variant_pairs(variant, pegs=3):
+    if variant == "adjacent":
+        return ((0, 1), (1, 0), (1, 2), (2, 1))
+    if variant == "cyclic":
+        return ((0, 1), (1, 2), (2, 0))
+    return all_pairs(pegs)
+
+_frame_stewart_tables = {}
+
+def frame_stewart_moves(n, pegs):
+    # Frame-Stewart numbers grow in runs: with p pegs the increment 2**t is
+    # repeated C(t + p - 3, p - 3) times, so the table fills in one pass. One
+    # table per peg count is kept for the life of the process and shared by
+    # every disk count.
+    if pegs < 3:
+        raise ValueError("at least three pegs are needed")
+    
+    table, run = _frame_stewart_tables.setdefault(pegs, ([0], [0, 1]))
+    while len(table) <= n:
+        t, left = run
+        table.append(table[-1] + (1 << t))
+        left -= 1
+        if left == 0:
+            t += 1
+            left = comb(t + pegs - 3, pegs - 3)
+        run[:] = [t, left]
+    return table[n]
+
+@lru_cache(maxsize=None)
+def frame_stewart_split(n, pegs):
+    # How many of the top disks are parked on a spare peg while the rest move
+    # with one peg fewer.
+    if pegs == 3 or n <= 1:
+        return max(n - 1, 0)
+    return min(range(1, n), key=lambda k: 2 * frame_stewart_moves(k, pegs) + frame_stewart_moves(n - k, pegs - 1))
+
+def frame_stewart(n, pegs):
+    return frame_stewart_moves(n, pegs), frame_stewart_split(n, pegs)
+
+class HanoiPlan:
+    # Optimal (Frame-Stewart for four or more pegs) plan moving all disks from
+    # the first peg to the last. Tasks are (disks, source, target, free pegs,
+    # moves to skip); three-peg tasks are handed to the bit-twiddling
+    # functions above, so nothing is materialised and any move can be reached
+    # in O(disks * pegs).
+    def __init__(self, disks, pegs=3):
+        if not 3 <= pegs <= MAX_PEGS:
+            raise ValueError(f"peg count must be between 3 and {MAX_PEGS}")
+        
+        self.disks = disks
+        self.pegs = pegs
+        self.source = 0
+        self.target = pegs - 1
+        self.start_state = (self.source,) * disks
+        self.goal_state = (self.target,) * disks
+        self.pairs = all_pairs(pegs)
+        self.total = frame_stewart_moves(disks, pegs)
+    
+    def split(self, n, source, target, free):
+        k = frame_stewart_split(n, len(free))
+        spare = next(peg for peg in free if peg != source and peg != target)
+        lower = tuple(peg for peg in free if peg != spare)
+        return k, spare, lower, frame_stewart_moves(k, len(free)), frame_stewart_moves(n - k, len(lower))
+    
+    def moves(self, start=0):
+        stack = [(self.disks, self.source, self.target, tuple(range(self.pegs)), start)]
+        while stack:
+            n, source, target, free, skip = stack.pop()
+            if n == 0 or skip >= frame_stewart_moves(n, len(free)):
+                continue
+            
+            if len(free) == 3:
+                auxiliary = next(peg for peg in free if peg != source and peg != target)
+                yield from hanoi_moves(n, source, target, auxiliary, start=skip)
+                continue
+            
+            k, spare, lower, parked, middle = self.split(n, source, target, free)
+            stack.append((k, spare, target, free, max(0, skip - parked - middle)))
+            stack.append((n - k, source, target, lower, max(0, skip - parked)))
+            stack.append((k, source, spare, free, skip))
+    
+    def transfers(self):
+        # The plan as consecutive three-peg tower transfers
+        # (disks, source, target, auxiliary).
+        stack = [(self.disks, self.source, self.target, tuple(range(self.pegs)))]
+        while stack:
+            n, source, target, free = stack.pop()
+            if n == 0:
+                continue
+            
+            if len(free) == 3:
+                yield n, source, target, next(peg for peg in free if peg != source and peg != target)
+                continue
+            
+            k, spare, lower, _, _ = self.split(n, source, target, free)
+            stack.append((k, spare, target, free))
+            stack.append((n - k, source, target, lower))
+            stack.append((k, source, spare, free))
+    
+    def descend(self, k, is_move):
+        # Walks down to the three-peg sub-problem containing move k (or the
+        # state after k moves), recording where the disks outside it sit.
+        placed = []
+        n, base, source, target, free = self.disks, 0, self.source, self.target, tuple(range(self.pegs))
+        while len(free) > 3 and n > 0:
+            k_split, spare, lower, parked, middle = self.split(n, source, target, free)
+            first = k < parked if is_move else k <= parked
+            second = k < parked + middle if is_move else k <= parked + middle
+            if first:
+                placed.append((base + k_split + 1, base + n, source))
+                n, target = k_split, spare
+            elif second:
+                placed.append((base + 1, base + k_split, spare))
+                n, base, free, k = n - k_split, base + k_split, lower, k - parked
+            else:
+                placed.append((base + k_split + 1, base + n, target))
+                n, source, k = k_split, spare, k - parked - middle
+        auxiliary = next(peg for peg in free if peg != source and peg != target)
+        return placed, n, base, source, target, auxiliary, k
+    
+    def state_after(self, k):
+        if not 0 <= k <= self.total:
+            raise ValueError(f"move index must be between 0 and {self.total}")
+        
+        placed, n, base, source, target, auxiliary, k = self.descend(k, False)
+        peg_of = [0] * (self.disks + 1)
+        for low, high, peg in placed:
+            for disk in range(low, high + 1):
+                peg_of[disk] = peg
+        for peg, tower in zip((source, target, auxiliary), hanoi_state_after(n, k, 0, 1, 2)):
+            for disk in tower:
+                peg_of[base + disk] = peg
+        
+        towers = [[] for _ in range(self.pegs)]
+        for disk in range(self.disks, 0, -1):
+            towers[peg_of[disk]].append(disk)
+        return towers
+    
+    def move_at(self, k):
+        if not 1 <= k <= self.total:
+            raise ValueError(f"move index must be between 1 and {self.total}")
+        
+        _, n, _, source, target, auxiliary, k = self.descend(k - 1, True)
+        return hanoi_move_at(n, k + 1, source, target, auxiliary)
+
+class AdjacentPlan:
+    # Peg 0 to peg 2 when disks may only move to a neighbouring peg.
+    def __init__(self, disks):
+        self.disks = disks
+        self.pegs = 3
+        self.source = 0
+        self.target = 2
+        self.start_state = (0,) * disks
+        self.goal_state = (2,) * disks
+        self.pairs = variant_pairs("adjacent")
+        self.total = adjacent_total_moves(disks)
+    
+    def moves(self, start=0):
+        return adjacent_moves(self.disks, start=start)
+    
+    def state_after(self, k):
+        if not 0 <= k <= self.total:
+            raise ValueError(f"move index must be between 0 and {self.total}")
+        if k == self.total:
+            return [[], [], list(range(self.disks, 0, -1))]
+        return adjacent_state_after(self.disks, k)
+    
+    def move_at(self, k):
+        return adjacent_move_at(self.disks, k)
+
+class CyclicPlan:
+    # Peg 0 to peg 2 when disks may only move one way round, 0 -> 1 -> 2 -> 0.
+    def __init__(self, disks):
+        self.disks = disks
+        self.pegs = 3
+        self.source = 0
+        self.target = 2
+        self.start_state = (0,) * disks
+        self.goal_state = (2,) * disks
+        self.pairs = variant_pairs("cyclic")
+        self.total = cyclic_total_moves(disks)
+    
+    def moves(self, start=0):
+        return cyclic_moves(self.disks, start=start)
+    
+    def state_after(self, k):
+        return cyclic_state_after(self.disks, k)
+    
+    def move_at(self, k):
+        return cyclic_move_at(self.disks, k)
+
+def towers_from_pegs(peg_of, pegs):
+    towers = [[] for _ in range(pegs)]
+    for disk in range(len(peg_of), 0, -1):
+        towers[peg_of[disk - 1]].append(disk)
+    return towers
+
+def pegs_from_towers(towers):
+    peg_of = [0] * sum(len(tower) for tower in towers)
+    for peg, tower in enumerate(towers):
+        for disk in tower:
+            peg_of[disk - 1] = peg
+    return tuple(peg_of)
+
+def parse_state(text, disks, pegs):
+    # "0,0,1,2" or "0012": the peg of disk 1 (the smallest), disk 2, and so on.
+    # Any assignment of disks to pegs is a legal position, since each peg's
+    # stack order follows from the disk sizes.
+    values = text.split(",") if "," in text else list(text)
+    try:
+        peg_of = tuple(int(value) for value in values)
+    except ValueError:
+        raise ValueError(f"state {text!r} must list a peg number for every disk")
+    if len(peg_of) != disks:
+        raise ValueError(f"state {text!r} gives {len(peg_of)} pegs for {disks} disks")
+    if any(not 0 <= peg < pegs for peg in peg_of):
+        raise ValueError(f"state {text!r} uses a peg outside 0-{pegs - 1}")
+    return peg_of
+
+def distance_to_tower(state, m, peg):
+    # Moves needed to gather disks 1..m of a three-peg state onto one peg.
+    moves = 0
+    for disk in range(m, 0, -1):
+        if state[disk - 1] != peg:
+            moves += 1 << (disk - 1)
+            peg = 3 - state[disk - 1] - peg
+    return moves
+
+def segment_length(segment):
+    return 1 if segment[0] == "move" else 2 ** segment[1] - 1
+
+def gather_segments(state, m, peg):
+    # The largest disk off the target peg moves once; everything smaller is
+    # first gathered on the third peg and then follows as a whole tower.
+    segments = []
+    for disk in range(m, 0, -1):
+        source = state[disk - 1]
+        if source != peg:
+            other = 3 - source - peg
+            if disk > 1:
+                segments.append(("tower", disk - 1, other, peg, source))
+            segments.append(("move", disk, source, peg))
+            peg = other
+    segments.reverse()
+    return segments
+
+def spread_segments(goal, m, peg):
+    segments = []
+    for segment in reversed(gather_segments(goal, m, peg)):
+        if segment[0] == "move":
+            segments.append(("move", segment[1], segment[3], segment[2]))
+        else:
+            segments.append(("tower", segment[1], segment[3], segment[2], segment[4]))
+    return segments
+
+def three_peg_segments(start, goal):
+    # Optimal path between any two three-peg states in O(n): the largest disk
+    # that differs moves either once, or twice via the third peg, and both
+    # candidates are costed with distance_to_tower before building one.
+    disk = len(start)
+    while disk and start[disk - 1] == goal[disk - 1]:
+        disk -= 1
+    if disk == 0:
+        return []
+    
+    source, target = start[disk - 1], goal[disk - 1]
+    other = 3 - source - target
+    m = disk - 1
+    
+    once = distance_to_tower(start, m, other) + 1 + distance_to_tower(goal, m, other)
+    twice = distance_to_tower(start, m, target) + 2 ** m + 1 + distance_to_tower(goal, m, source)
+    
+    if once <= twice:
+        return gather_segments(start, m, other) + [("move", disk, source, target)] + spread_segments(goal, m, other)
+    return (gather_segments(start, m, target) + [("move", disk, source, other)]
+            + ([("tower", m, target, source, other)] if m else [])
+            + [("move", disk, other, target)] + spread_segments(goal, m, source))
+
+def state_code(peg_of, pegs):
+    code = 0
+    for peg in reversed(peg_of):
+        code = code * pegs + peg
+    return code
+
+def state_neighbors(code, disks, pegs, powers, pairs):
+    # Yields (next code, disk, source, target) for every legal move in `pairs`.
+    top = [0] * pegs
+    for disk in range(1, disks + 1):
+        peg = code // powers[disk - 1] % pegs
+        if not top[peg]:
+            top[peg] = disk
+    for source, target in pairs:
+        disk = top[source]
+        if disk and (not top[target] or top[target] > disk):
+            yield code + (target - source) * powers[disk - 1], disk, source, target
+
+def all_pairs(pegs):
+    return tuple((a, b) for a in range(pegs) for b in range(pegs) if a != b)
+
+@lru_cache(maxsize=8)
+def distance_table(disks, pegs, goal, pairs):
+    # Breadth-first search backwards from the goal over the whole state space;
+    # table[code] is the exact distance of every state to the goal. Distances
+    # are below the number of states, which can pass 65535 (3**11 - 1 for the
+    # restricted variants), so entries are at least 32-bit.
+    powers = [pegs ** i for i in range(disks)]
+    reverse = tuple((b, a) for a, b in pairs)
+    table = array("L", [UNREACHED]) * pegs ** disks
+    frontier = [state_code(goal, pegs)]
+    table[frontier[0]] = 0
+    distance = 0
+    while frontier:
+        distance += 1
+        following = []
+        for code in frontier:
+            for neighbor, _, _, _ in state_neighbors(code, disks, pegs, powers, reverse):
+                if table[neighbor] == UNREACHED:
+                    table[neighbor] = distance
+                    following.append(neighbor)
+        frontier = following
+    return table
+
+def table_segments(start, goal, pegs, pairs):
+    disks = len(start)
+    table = distance_table(disks, pegs, tuple(goal), pairs)
+    powers = [pegs ** i for i in range(disks)]
+    code = state_code(start, pegs)
+    if table[code] == UNREACHED:
+        raise ValueError("the goal cannot be reached from this start")
+    
+    segments = []
+    while table[code]:
+        for neighbor, disk, source, target in state_neighbors(code, disks, pegs, powers, pairs):
+            if table[neighbor] == table[code] - 1:
+                segments.append(("move", disk, source, target))
+                code = neighbor
+                break
+    return segments
+
+def search_segments(start, goal, pegs, pairs, limit=SEARCH_LIMIT):
+    # Bidirectional breadth-first search for instances too large for a full
+    # distance table; the smaller frontier is always expanded next.
+    disks = len(start)
+    powers = [pegs ** i for i in range(disks)]
+    reverse = tuple((b, a) for a, b in pairs)
+    begin, end = state_code(start, pegs), state_code(goal, pegs)
+    if begin == end:
+        return []
+    
+    forward, backward = {begin: None}, {end: None}
+    forward_frontier, backward_frontier = [begin], [end]
+    while forward_frontier and backward_frontier:
+        if len(forward) + len(backward) > limit:
+            raise ValueError(f"search gave up after {limit} states; use fewer disks or pegs")
+        
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        seen, other = (forward, backward) if expand_forward else (backward, forward)
+        frontier = forward_frontier if expand_forward else backward_frontier
+        following = []
+        meeting = None
+        for code in frontier:
+            for neighbor, disk, source, target in state_neighbors(code, disks, pegs, powers, pairs if expand_forward else reverse):
+                if neighbor not in seen:
+                    seen[neighbor] = (code, disk, source, target)
+                    following.append(neighbor)
+                    if neighbor in other:
+                        meeting = neighbor
+                        break
+            if meeting is not None:
+                break
+        
+        if meeting is not None:
+            segments = []
+            code = meeting
+            while forward[code] is not None:
+                code, disk, source, target = forward[code]
+                segments.append(("move", disk, source, target))
+            segments.reverse()
+            code = meeting
+            while backward[code] is not None:
+                code, disk, source, target = backward[code]
+                segments.append(("move", disk, target, source))
+            return segments
+        
+        if expand_forward:
+            forward_frontier = following
+        else:
+            backward_frontier = following
+    raise ValueError("the goal cannot be reached from this start")
+
+class StatePlan:
+    # A solution between two arbitrary states, stored as O(n) segments: single
+    # moves and whole-tower transfers. Tower segments are expanded lazily by the
+    # bit-based functions, so random access stays cheap.
+    def __init__(self, start, goal, pegs, segments, pairs=None):
+        self.disks = len(start)
+        self.pegs = pegs
+        self.start_state = tuple(start)
+        self.goal_state = tuple(goal)
+        self.pairs = pairs if pairs is not None else all_pairs(pegs)
+        self.segments = segments
+        self.offsets = []
+        self.total = 0
+        for segment in segments:
+            self.offsets.append(self.total)
+            self.total += segment_length(segment)
+    
+    def segment_at(self, k):
+        index = bisect_right(self.offsets, k) - 1
+        return index, k - self.offsets[index]
+    
+    def moves(self, start=0):
+        if start >= self.total:
+            return
+        index, skip = self.segment_at(start)
+        for segment in self.segments[index:]:
+            if segment[0] == "move":
+                if not skip:
+                    yield segment[2], segment[3]
+            else:
+                yield from hanoi_moves(segment[1], segment[2], segment[3], segment[4], start=skip)
+            skip = 0
+    
+    def transfers(self):
+        for segment in self.segments:
+            if segment[0] == "move":
+                yield 1, segment[2], segment[3], None
+            else:
+                yield segment[1:]
+    
+    def state_after(self, k):
+        if not 0 <= k <= self.total:
+            raise ValueError(f"move index must be between 0 and {self.total}")
+        
+        peg_of = list(self.start_state)
+        for offset, segment in zip(self.offsets, self.segments):
+            if offset >= k:
+                break
+            done = min(k - offset, segment_length(segment))
+            if segment[0] == "move":
+                peg_of[segment[1] - 1] = segment[3]
+            else:
+                _, m, source, target, auxiliary = segment
+                for peg, tower in zip((source, target, auxiliary), hanoi_state_after(m, done, 0, 1, 2)):
+                    for disk in tower:
+                        peg_of[disk - 1] = peg
+        return towers_from_pegs(peg_of, self.pegs)
+    
+    def move_at(self, k):
+        if not 1 <= k <= self.total:
+            raise ValueError(f"move index must be between 1 and {self.total}")
+        
+        index, skip = self.segment_at(k - 1)
+        segment = self.segments[index]
+        if segment[0] == "move":
+            return segment[2], segment[3]
+        return hanoi_move_at(segment[1], skip + 1, segment[2], segment[3], segment[4])
+
+def make_plan(disks, pegs=3, start=None, goal=None, variant="classic"):
+    # Perfect tower to perfect tower uses HanoiPlan (or the plan for the
+    # variant); anything else uses the closed form on three pegs and a cached
+    # distance table or bidirectional search otherwise, which also covers the
+    # restricted variants through their allowed moves.
+    if variant not in VARIANTS:
+        raise ValueError(f"unknown variant {variant!r}")
+    if variant != "classic" and pegs != 3:
+        raise ValueError(f"the {variant} variant is played on three pegs")
+    
+    start = tuple(start) if start is not None else (0,) * disks
+    goal = tuple(goal) if goal is not None else (pegs - 1,) * disks
+    standard = start == (0,) * disks and goal == (pegs - 1,) * disks
+    
+    if standard and variant == "adjacent":
+        return AdjacentPlan(disks)
+    if standard and variant == "cyclic":
+        return CyclicPlan(disks)
+    if standard:
+        return HanoiPlan(disks, pegs)
+    if pegs == 3 and variant == "classic":
+        return StatePlan(start, goal, pegs, three_peg_segments(start, goal))
+    
+    pairs = variant_pairs(variant, pegs)
+    if pegs ** disks <= TABLE_STATES:
+        return StatePlan(start, goal, pegs, table_segments(start, goal, pegs, pairs), pairs)
+    return StatePlan(start, goal, pegs, search_segments(start, goal, pegs, pairs), pairs)
+
+def closed_form(disks, pegs=3, start=None, goal=None, variant="classic"):
+    # Whether make_plan() returns without building a distance table or
+    # searching: the perfect towers, or any position on three classic pegs.
+    standard = ((start is None or tuple(start) == (0,) * disks)
+                and (goal is None or tuple(goal) == (pegs - 1,) * disks))
+    return standard or pegs == 3 and variant == "classic"
+
+def quick_to_plan(disks, pegs=3, variant="classic"):
+    # Whether make_plan() answers at once for any start and goal: the closed
+    # form or a distance table, rather than the bidirectional search, which
+    # can take seconds before finding a path or giving up.
+    return pegs == 3 and variant == "classic" or pegs ** disks <= TABLE_STATES
+
+def replay_moves(towers, moves, allowed, count=0):
+    # Plays moves count+1, count+2, ... on towers; returns the number of the
+    # last move played and the reason the next one is illegal, if any.
+    pegs = len(towers)
+    for count, (a, b) in enumerate(moves, count + 1):
+        if (a, b) not in allowed:
+            if not (0 <= a < pegs and 0 <= b < pegs) or a == b:
+                return count - 1, f"move {count}: {a} -> {b} is not a move between two of the {pegs} pegs"
+            return count - 1, f"move {count}: {a} -> {b} is not allowed in this variant"
+        if not towers[a]:
+            return count - 1, f"move {count}: peg {a} is empty"
+        if towers[b] and towers[b][-1] < towers[a][-1]:
+            return count - 1, f"move {count}: disk {towers[a][-1]} cannot go on disk {towers[b][-1]}"
+        towers[b].append(towers[a].pop())
+    return count, None
+
+def verify_moves(plan, moves, start=0):
+    # Checks moves start+1, start+2, ... beginning from the plan's position
+    # after its first `start` moves, one move at a time.
+    towers = plan.state_after(start)
+    count, error = replay_moves(towers, moves, set(plan.pairs), start)
+    if error:
+        return False, error
+    return goal_verdict(plan, towers, count)
+
+def goal_verdict(plan, towers, count):
+    if towers != plan.state_after(plan.total):
+        return False, f"after {count} moves the disks are not in the goal position"
+    if count != plan.total:
+        return True, f"solved in {count} moves (optimal is {plan.total})"
+    return True, f"solved optimally in {count} moves"
+
+class MoveChecker:
+    # Checks a move stream a group of moves at a time instead of move by move.
+    # Disks are peeled off smallest first: following only disk d through the
+    # moves that do not move a smaller disk, a move a -> b moves d when d is on
+    # a, is illegal when d is on b (a larger disk would land on it) and is
+    # otherwise left for disk d + 1. What that does to a group of moves depends
+    # only on the peg d starts on, so the outcome is cached per (peg, group
+    # bytes) and a group costs one dict lookup. About half the moves are left
+    # for each next disk, kept as one byte per move.
+    #
+    # A chunk that fails anywhere is replayed move by move from its start to
+    # name the first illegal move. So is one whose groups keep missing the
+    # cache (a stream with little repetition), where the per-move loop wins.
+    def __init__(self, plan, start=0):
+        self.plan = plan
+        self.allowed = set(plan.pairs)
+        self.encode, self.pairs = move_codes(plan.pegs)
+        self.bits = move_bits(plan.pegs)
+        self.positions = list(pegs_from_towers(plan.state_after(start)))
+        self.count = start
+        self.error = None
+        self.miss_budget = 0
+        self.missed = 0
+        self.lookups = 0
+        self.decoders = {"codes": list, "packed": self.decode_packed, "text": self.decode_text}
+        self.tables = {kind: [{} for _ in range(plan.pegs)] for kind in self.decoders}
+        
+    def decode_packed(self, key):
+        value = int.from_bytes(key, "little")
+        mask = (1 << self.bits) - 1
+        return [value >> shift & mask for shift in range(0, len(key) * 8 // self.bits * self.bits, self.bits)]
+        
+    def decode_text(self, key):
+        # Lines of exactly "a b\n" with single-digit pegs; anything else has
+        # already been sent down the line-by-line path.
+        return [self.encode.get((key[at] - 48, key[at + 2] - 48), INVALID_CODE) for at in range(0, len(key), 4)]
+        
+    def step(self, peg, codes):
+        passed = bytearray()
+        for code in codes:
+            if code >= len(self.pairs):
+                return None
+            a, b = self.pairs[code]
+            if (a, b) not in self.allowed or peg == b:
+                return None
+            if peg == a:
+                peg = b
+            else:
+                passed.append(code)
+        return peg, bytes(passed)
+        
+    def scan(self, disk, data, size, kind):
+        decode = self.decoders[kind]
+        tables = self.tables[kind]
+        peg = self.positions[disk]
+        passed = []
+        for at in range(0, len(data), size):
+            key = data[at:at + size]
+            entry = tables[peg].get(key)
+            if entry is None:
+                self.missed += 1
+                self.miss_budget -= 1
+                if self.miss_budget < 0:
+                    return None
+                entry = self.step(peg, decode(key))
+                if entry is None:
+                    return None
+                if len(tables[peg]) >= CHECK_CACHE:
+                    tables[peg].clear()
+                tables[peg][key] = entry
+            peg, moves = entry
+            passed.append(moves)
+        self.positions[disk] = peg
+        self.lookups += len(passed)
+        return b"".join(passed)
+        
+    def feed(self, data, size, kind, count, moves):
+        # Checks the next `count` moves, held in data as groups of `size` bytes
+        # of the given kind; moves() gives them as pairs should one be illegal.
+        # Returns False from the first illegal move on, with self.error set.
+        if self.error:
+            return False
+        started = list(self.positions)
+        # A chunk may miss the cache for a quarter of its groups (enough for
+        # the cache to warm up) while misses have stayed below a quarter of
+        # all lookups so far; after that only CHECK_MISSES before replaying.
+        self.miss_budget = CHECK_MISSES
+        if 4 * self.missed <= self.lookups:
+            self.miss_budget += count // CHECK_GROUP // 4
+        passed = data
+        for disk in range(len(self.positions)):
+            if not passed:
+                break
+            passed = self.scan(disk, passed, size, kind)
+            if passed is None:
+                break
+            size, kind = CHECK_GROUP, "codes"
+        
+        # Moves left over once every disk has been followed come from an
+        # empty peg.
+        if passed is None or passed:
+            # None is an illegal move or a chunk not worth scanning.
+            towers = towers_from_pegs(started, self.plan.pegs)
+            self.count, self.error = replay_moves(towers, moves(), self.allowed, self.count)
+            self.positions = list(pegs_from_towers(towers))
+            return self.error is None
+        self.count += count
+        return True
+        
+    def feed_moves(self, moves):
+        codes = bytes(self.encode.get(move, INVALID_CODE) for move in moves)
+        return self.feed(codes, CHECK_GROUP, "codes", len(codes), lambda: moves)
+        
+    def feed_text(self, data, first_line):
+        # One chunk of whole lines. The format 'solve' writes, "a b\n" with
+        # single-digit pegs, is checked four bytes per move; comments, blank
+        # lines and wider pegs are read line by line.
+        lines = data.count(b"\n")
+        if (len(data) == 4 * lines and data[1::4].count(b" ") == lines and data[3::4].count(b"\n") == lines
+                and not (data[0::4] + data[2::4]).translate(None, b"0123456789")):
+            moves = lambda: [(data[at] - 48, data[at + 2] - 48) for at in range(0, len(data), 4)]
+            return self.feed(data, 4 * CHECK_GROUP, "text", lines, moves)
+        return self.feed_moves(list(read_moves(data.decode().splitlines(), first_line)))
+        
+    def verdict(self):
+        if self.error:
+            return False, self.error
+        return goal_verdict(self.plan, towers_from_pegs(self.positions, self.plan.pegs), self.count)
+
+def verify_packed(plan, packed, start=0):
+    # The file holds moves start+1, start+2, ... of a solution; they are
+    # checked CHECK_CHUNK moves at a time, CHECK_GROUP moves per group.
+    if packed.pegs != plan.pegs:
+        raise ValueError(f"move file is for {packed.pegs} pegs, not {plan.pegs}")
+    
+    checker = MoveChecker(plan, start)
+    bits = packed.bits
+    data = packed.data()
+    whole = packed.count - packed.count % CHECK_GROUP
+    for index in range(0, whole, CHECK_CHUNK):
+        count = min(CHECK_CHUNK, whole - index)
+        chunk = bytes(data[index * bits // 8:(index + count) * bits // 8])
+        moves = lambda index=index, count=count: list(islice(packed.iter_from(index), count))
+        if not checker.feed(chunk, CHECK_GROUP * bits // 8, "packed", count, moves):
+            return checker.verdict()
+    checker.feed_moves(list(packed.iter_from(whole)))
+    return checker.verdict()
+
+def verify_text(plan, stream, start=0):
+    # Checks a binary stream of 'source target' lines a chunk of lines at a
+    # time; see MoveChecker.feed_text.
+    checker = MoveChecker(plan, start)
+    first_line = 1
+    while True:
+        data = stream.read(4 * CHECK_CHUNK)
+        if not data:
+            break
+        if not data.endswith(b"\n"):
+            data += stream.readline()
+        if not checker.feed_text(data, first_line):
+            break
+        first_line += data.count(b"\n")
+    return checker.verdict()
+
+def write_moves(moves, stream, chunk_size=65536):
+    while True:
+        chunk = list(islice(moves, chunk_size))
+        if not chunk:
+            break
+        stream.write("".join(f"{a} {b}\n" for a, b in chunk))
+
+def read_moves(stream, first_line=1):
+    for line_number, line in enumerate(stream, first_line):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            a, b = line.split()
+            yield int(a), int(b)
+        except ValueError:
+            raise ValueError(f"line {line_number}: expected 'source target', got {line!r}")
+
+def disk_count(value):
+    n = int(value)
+    if not 1 <= n <= MAX_DISKS:
+        raise argparse.ArgumentTypeError(f"disk count must be between 1 and {MAX_DISKS}")
+    return n
+
+def peg_count(value):
+    pegs = int(value)
+    if not 3 <= pegs <= MAX_PEGS:
+        raise argparse.ArgumentTypeError(f"peg count must be between 3 and {MAX_PEGS}")
+    return pegs
+
+def move_count(value):
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError("move counts cannot be negative")
+    return n
+
+def add_plan_arguments(parser):
+    parser.add_argument("disks", type=disk_count)
+    parser.add_argument("-p", "--pegs", type=peg_count, default=3, help="number of pegs (default: 3)")
+    parser.add_argument("--from", dest="start_state", metavar="STATE",
+                        help="start position as the peg of each disk, smallest first, e.g. 0120 (default: all on peg 0)")
+    parser.add_argument("--to", dest="goal_state", metavar="STATE",
+                        help="goal position in the same form (default: all on the last peg)")
+    parser.add_argument("--variant", choices=VARIANTS, default="classic",
+                        help="'adjacent' only allows moves between neighbouring pegs, "
+                             "'cyclic' only 0 -> 1 -> 2 -> 0 (both need three pegs)")
+
+def plan_from_arguments(args):
+    start = parse_state(args.start_state, args.disks, args.pegs) if args.start_state else None
+    goal = parse_state(args.goal_state, args.disks, args.pegs) if args.goal_state else None
+    return make_plan(args.disks, args.pegs, start, goal, args.variant)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="hanoi_solver", description="Headless Tower of Hanoi solver.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    count = commands.add_parser("count", help="print the number of moves in the optimal solution")
+    add_plan_arguments(count)
+    
+    solve = commands.add_parser("solve", help="write the optimal move stream, one 'source target' pair per line")
+    add_plan_arguments(solve)
+    solve.add_argument("-o", "--output", help="output file (default: stdout)")
+    solve.add_argument("--start", type=move_count, default=0, help="skip the first START moves")
+    solve.add_argument("--limit", type=move_count, help="stop after LIMIT moves")
+    solve.add_argument("--format", choices=["text", "packed"], default="text",
+                       help="'packed' writes the compact binary format read by PackedMoves")
+    
+    move = commands.add_parser("move", help="print move K of the optimal solution")
+    add_plan_arguments(move)
+    move.add_argument("k", type=int)
+    
+    state = commands.add_parser("state", help="print the pegs after the first K moves")
+    add_plan_arguments(state)
+    state.add_argument("k", type=int)
+    
+    verify = commands.add_parser("verify", help="check a move stream written by 'solve'")
+    add_plan_arguments(verify)
+    verify.add_argument("input", help="text or packed move file, or - for stdin")
+    
+    diff = commands.add_parser("diff", help="report the first move where two packed move files differ")
+    diff.add_argument("first")
+    diff.add_argument("second")
+    
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    try:
+        if args.command != "diff":
+            plan = plan_from_arguments(args)
+        
+        if args.command == "count":
+            print(plan.total)
+        
+        elif args.command == "solve":
+            moves = plan.moves(start=args.start)
+            if args.limit is not None:
+                moves = islice(moves, args.limit)
+            if args.format == "packed":
+                count = max(0, plan.total - args.start)
+                if args.limit is not None:
+                    count = min(count, args.limit)
+                # The header records how many moves come before the first
+                # written one and the position they leave.
+                start = min(args.start, plan.total)
+                start_state = pegs_from_towers(plan.state_after(start))
+                if args.output:
+                    with open(args.output, "wb") as stream:
+                        write_packed(stream, moves, plan.disks, plan.pegs, start_state, count, start)
+                else:
+                    write_packed(sys.stdout.buffer, moves, plan.disks, plan.pegs, start_state, count, start)
+            elif args.output:
+                with open(args.output, "w") as stream:
+                    write_moves(moves, stream)
+            else:
+                write_moves(moves, sys.stdout)
+        
+        elif args.command == "move":
+            print(*plan.move_at(args.k))
+        
+        elif args.command == "state":
+            for peg, tower in enumerate(plan.state_after(args.k)):
+                print(f"{peg}: {' '.join(map(str, tower))}")
+        
+        elif args.command == "verify":
+            if args.input == "-":
+                ok, message = verify_text(plan, sys.stdin.buffer)
+            elif is_packed(args.input):
+                with PackedMoves.open(args.input) as packed:
+                    if (packed.disks, packed.pegs) != (plan.disks, plan.pegs):
+                        raise ValueError(f"{args.input} holds a {packed.disks}-disk, {packed.pegs}-peg solution")
+                    if packed.start > plan.total:
+                        raise ValueError(f"{args.input} starts after move {packed.start} of a {plan.total}-move solution")
+                    if tuple(packed.start_state) != pegs_from_towers(plan.state_after(packed.start)):
+                        raise ValueError(f"{args.input} starts from a different position")
+                    ok, message = verify_packed(plan, packed, packed.start)
+            else:
+                with open(args.input, "rb") as stream:
+                    ok, message = verify_text(plan, stream)
+            print(message)
+            return 0 if ok else 1
+        
+        elif args.command == "diff":
+            with PackedMoves.open(args.first) as first, PackedMoves.open(args.second) as second:
+                index = first_difference(first, second)
+            if index is None:
+                print("move streams are identical")
+                return 0
+            print(f"first difference at move {index + 1}")
+            return 1
+    
+    except ValueError as error:
+        print(f"hanoi_solver: error: {error}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        sys.stderr.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())